@@ -2,9 +2,9 @@ import data_provider as yf
 import pandas as pd
 import pandas_ta as ta
 import numpy as np
-import requests
-import json
 import time
+import heapq
+import threading
 import sys
 import os
 
@@ -15,6 +15,11 @@ try:
 except ImportError:
     FundamentalCache = None
 
+from performance_utils import timed_cache, get_ai_client
+
+# Scanner results are reused for this long (Force Refresh in the UI clears them)
+SCANNER_CACHE_SECONDS = 900
+
 try:
     from scanner_robustness import ScannerConfig, DataValidator
 except ImportError:
@@ -26,6 +31,44 @@ except ImportError:
         CYCLICAL_MIN_RETURN = 2.0
     DataValidator = None
 
+# Weinstein stage buckets, in display order
+WEINSTEIN_STAGES = (
+    "Stage 1 - Basing",
+    "Stage 2 - Advancing",
+    "Stage 3 - Top",
+    "Stage 4 - Declining",
+)
+
+# Per-ticker quarterly returns, keyed on (ticker, last bar, row count) so a
+# rescan over unchanged history skips the groupby entirely. FIFO-evicted.
+_QUARTER_CACHE = {}
+_QUARTER_CACHE_MAX = 4096
+_quarter_cache_lock = threading.Lock()
+
+
+def _quarterly_returns(ticker, df):
+    """Return {'Q1': [...], ..., 'Q4': [...]} of per-year quarter % returns."""
+    key = (ticker, df.index[-1], len(df))
+    with _quarter_cache_lock:
+        cached = _QUARTER_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    grouped = df['Close'].groupby([df.index.year, df.index.quarter])
+    first = grouped.first().astype(float)
+    last = grouped.last().astype(float)
+    returns = (last - first) / first * 100
+
+    quarterly_returns = {'Q1': [], 'Q2': [], 'Q3': [], 'Q4': []}
+    for (_, q), ret in returns.items():
+        quarterly_returns[f'Q{q}'].append(ret)
+
+    with _quarter_cache_lock:
+        _QUARTER_CACHE[key] = quarterly_returns
+        if len(_QUARTER_CACHE) > _QUARTER_CACHE_MAX:
+            del _QUARTER_CACHE[next(iter(_QUARTER_CACHE))]
+    return quarterly_returns
+
 
 class AnalysisEngine:
 
@@ -35,6 +78,8 @@ class AnalysisEngine:
         self.period = period
         self.bb_cols = {"upper": None, "middle": None, "lower": None}
         self.indicator_cols = {"rsi": None, "macd": None, "macds": None, "macdh": None}
+        self._analysis = None
+        self._analyzed = False
         
         # Use provided data if available to perform analysis without re-fetching
         if data is not None and not data.empty:
@@ -72,14 +117,7 @@ class AnalysisEngine:
                         df.columns = df.columns.get_level_values(0)
 
                     if self.interval == '4h':
-                        logic = {
-                            'Open': 'first',
-                            'High': 'max',
-                            'Low': 'min',
-                            'Close': 'last',
-                            'Volume': 'sum'
-                        }
-                        df = df.resample('4H').apply(logic).dropna()
+                        df = self.resample_4h(df)
 
                     return df
 
@@ -94,6 +132,18 @@ class AnalysisEngine:
         )
 
 
+    @staticmethod
+    def resample_4h(df):
+        """Aggregate 1h bars into 4h OHLCV bars (yfinance has no native 4h)."""
+        logic = {
+            'Open': 'first',
+            'High': 'max',
+            'Low': 'min',
+            'Close': 'last',
+            'Volume': 'sum'
+        }
+        return df.resample('4H').apply(logic).dropna()
+
     def add_indicators(self):
         self.data.ta.ema(length=9, append=True)
         self.data.ta.ema(length=21, append=True)
@@ -129,6 +179,17 @@ class AnalysisEngine:
         return self.data
 
     def analyze(self):
+        """Technical summary for the latest bar; computed once per engine.
+
+        add_indicators() appends columns to self.data, so re-running it on the
+        same frame would duplicate them; repeat calls return the first result.
+        """
+        if not self._analyzed:
+            self._analysis = self._run_analysis()
+            self._analyzed = True
+        return self._analysis
+
+    def _run_analysis(self):
 
         self.add_indicators()
 
@@ -255,22 +316,8 @@ class AnalysisEngine:
                 return None
             
             # Group by quarter and calculate returns
-            self.data['Year'] = self.data.index.year
-            self.data['Quarter'] = self.data.index.quarter
-            self.data['QuarterKey'] = self.data['Year'].astype(str) + '-Q' + self.data['Quarter'].astype(str)
-            
             quarterly_returns = {}
-            for q in ['Q1', 'Q2', 'Q3', 'Q4']:
-                q_data = []
-                for year in range(self.data['Year'].min(), self.data['Year'].max() + 1):
-                    q_key = f"{year}-{q}"
-                    q_df = self.data[self.data['QuarterKey'] == q_key]
-                    if len(q_df) > 0:
-                        start_price = q_df['Close'].iloc[0]
-                        end_price = q_df['Close'].iloc[-1]
-                        ret = ((end_price - start_price) / start_price) * 100
-                        q_data.append(ret)
-                
+            for q, q_data in _quarterly_returns(self.ticker, self.data).items():
                 if q_data:
                     quarterly_returns[q] = sum(q_data) / len(q_data)
             
@@ -381,7 +428,7 @@ class AnalysisEngine:
             if "/chat/completions" not in url:
                 url = f"{url.rstrip('/')}/chat/completions"
             
-            response = requests.post(url, headers=headers, data=json.dumps(payload), timeout=60)
+            response = get_ai_client().post(url, headers=headers, json=payload, timeout=60)
             response.raise_for_status()
             result = response.json()
             return result['choices'][0]['message']['content']
@@ -389,24 +436,21 @@ class AnalysisEngine:
             return f"AI Insight Error: {str(e)}"
 
     @staticmethod
+    @timed_cache(SCANNER_CACHE_SECONDS, ignore=('progress_callback',))
     def get_smart_money_stocks(tickers, max_results=20, max_workers=8, progress_callback=None):
         """Smart Money Concept scanner - Detects institutional activity patterns."""
-        from performance_utils import parallel_process_stocks, batch_download_data
+        from performance_utils import pipelined_scan
         
-        # 1. BATCH DOWNLOAD ALL DATA FIRST (Huge speedup)
-        # print("Downloading data for Smart Money Scanner...")
-        batch_data = batch_download_data(tickers, period='60d', interval='1d')
-        
-        def process_smc(ticker):
+        # 1. BATCH DOWNLOAD (pipelined: next batch downloads while this one is processed)
+        def process_smc(ticker, batch_data):
             try:
                 full_ticker = f"{ticker}.NS" if not ticker.endswith(".NS") else ticker
                 
                 # Retrieve from batch data
-                df = None
-                if ticker in batch_data:
-                    df = batch_data[ticker]
-                elif full_ticker.replace('.NS', '') in batch_data:
-                    df = batch_data[full_ticker.replace('.NS', '')]
+                # pop, not get: each frame is freed as soon as its ticker is done
+                df = batch_data.pop(ticker, None)
+                if df is None:
+                    df = batch_data.pop(full_ticker.replace('.NS', ''), None)
                 
                 if df is None or df.empty or len(df) < ScannerConfig.SMC_MIN_ROWS:
                     return None
@@ -414,20 +458,26 @@ class AnalysisEngine:
                 if 'Volume' not in df.columns:
                     return None
                 
+                # Pull the last 50 rows into raw NumPy once - positional indexing
+                # avoids a pandas label lookup on every access below
+                tail = df[['Close', 'Volume']].iloc[-50:].to_numpy(dtype=float)
+                close = tail[:, 0]
+                volume = tail[:, 1]
+
                 # Calculate multiple volume metrics
-                avg_volume_20 = df['Volume'].iloc[-20:].mean()
-                avg_volume_50 = df['Volume'].iloc[-50:].mean()
-                current_volume = df['Volume'].iloc[-1]
-                prev_volume = df['Volume'].iloc[-2]
-                
+                avg_volume_20 = np.nanmean(volume[-20:])
+                avg_volume_50 = np.nanmean(volume)
+                current_volume = volume[-1]
+                prev_volume = volume[-2]
+
                 # Volume spike calculations
                 volume_spike_20 = ((current_volume - avg_volume_20) / avg_volume_20) * 100 if avg_volume_20 > 0 else 0
                 volume_surge = ((current_volume - prev_volume) / prev_volume) * 100 if prev_volume > 0 else 0
-                
+
                 # Price action
-                price = df['Close'].iloc[-1]
-                price_change_5d = ((df['Close'].iloc[-1] - df['Close'].iloc[-5]) / df['Close'].iloc[-5]) * 100
-                price_change_10d = ((df['Close'].iloc[-1] - df['Close'].iloc[-10]) / df['Close'].iloc[-10]) * 100
+                price = close[-1]
+                price_change_5d = ((close[-1] - close[-5]) / close[-5]) * 100
+                price_change_10d = ((close[-1] - close[-10]) / close[-10]) * 100
                 
                 # Detect patterns
                 signal_type = "Neutral"
@@ -496,29 +546,27 @@ class AnalysisEngine:
         # Use parallel processing for calculation (CPU bound now, not I/O bound)
         # We can increase workers significantly or just use main thread if list is small, 
         # but parallel is still good for 2000 iterations
-        results = parallel_process_stocks(tickers, process_smc, max_workers=20, max_stocks=None, timeout_per_stock=1.0, progress_callback=progress_callback)
-        results = sorted(results, key=lambda x: x.get('Smart Money Score (0–100)', 0), reverse=True)
-        return results[:max_results]
+        results = pipelined_scan(tickers, process_smc, period='60d', interval='1d', max_workers=20, timeout_per_stock=1.0, progress_callback=progress_callback)
+        # Top-K via a bounded heap; symbol breaks ties so reruns order the same
+        return heapq.nsmallest(max_results, results, key=lambda x: (-x.get('Smart Money Score (0–100)', 0), x['Stock Symbol']))
 
     @staticmethod
+    @timed_cache(SCANNER_CACHE_SECONDS, ignore=('progress_callback',))
     def get_swing_stocks(tickers, interval='1d', period='60d', max_results=20, max_workers=8, progress_callback=None, min_market_cap=2000000000):
         """Swing Trading Scanner (15-20 days)."""
-        from performance_utils import parallel_process_stocks, batch_download_data
+        from performance_utils import pipelined_scan
         from scanner_robustness import ScannerConfig
         
-        # 1. BATCH DOWNLOAD
-        batch_data = batch_download_data(tickers, period=period, interval=interval)
-
-        def process_swing(ticker):
+        # 1. BATCH DOWNLOAD (pipelined with processing, see pipelined_scan)
+        def process_swing(ticker, batch_data):
             try:
                 full_ticker = f"{ticker}.NS" if not ticker.endswith(".NS") else ticker
                 
                 # Retrieve from batch
-                df = None
-                if ticker in batch_data:
-                    df = batch_data[ticker]
-                elif full_ticker.replace('.NS', '') in batch_data:
-                    df = batch_data[full_ticker.replace('.NS', '')]
+                # pop, not get: each frame is freed as soon as its ticker is done
+                df = batch_data.pop(ticker, None)
+                if df is None:
+                    df = batch_data.pop(full_ticker.replace('.NS', ''), None)
                 
                 if df is None or df.empty or len(df) < ScannerConfig.SWING_MIN_ROWS:
                     return None
@@ -583,21 +631,27 @@ class AnalysisEngine:
                 return None
         
         # CPU bound processing now
-        results = parallel_process_stocks(tickers, process_swing, max_workers=20, max_stocks=None, timeout_per_stock=1.0, progress_callback=progress_callback)
-        results = sorted(results, key=lambda x: x.get('Confidence Score (0–100)', 0), reverse=True)
-        return results[:max_results]
+        results = pipelined_scan(tickers, process_swing, period=period, interval=interval, max_workers=20, timeout_per_stock=1.0, progress_callback=progress_callback)
+        return heapq.nsmallest(max_results, results, key=lambda x: (-x.get('Confidence Score (0–100)', 0), x['Stock Symbol']))
 
     @staticmethod
+    @timed_cache(SCANNER_CACHE_SECONDS, ignore=('progress_callback',))
     def get_long_term_stocks(tickers, max_results=20, max_workers=4, progress_callback=None):
         """Long-term investing scanner based on fundamentals."""
         from performance_utils import parallel_process_stocks
         import data_provider as yf
         
-        def process_long_term(ticker):
+        def process_long_term(ticker, t=None, pre_mcap=None):
             try:
                 # Add timeout protection
                 full_ticker = f"{ticker}.NS" if not ticker.endswith(".NS") else ticker
-                t = yf.Ticker(full_ticker)
+                if t is None:
+                    t = yf.ticker(full_ticker)
+                
+                # Market cap already looked up by the batch prefetch: small caps
+                # are dropped before touching .info
+                if pre_mcap and pre_mcap < 2000000000:
+                    return None
                 
                 # Try to get info with timeout protection
                 info = None
@@ -621,7 +675,7 @@ class AnalysisEngine:
                 if not info or len(info) == 0:
                     return None
                 
-                market_cap = info.get('marketCap', 0) or info.get('market_cap', 0)
+                market_cap = info.get('marketCap', 0) or info.get('market_cap', 0) or pre_mcap
                 if not market_cap or market_cap < 2000000000:  # Min 200 Cr (more lenient)
                     return None
                 
@@ -719,58 +773,65 @@ class AnalysisEngine:
                 print(f"[DEBUG] Error in process_long_term for {ticker}: {e}")
                 return None
         
-        # Use all tickers provided, don't limit artificially
-        results = parallel_process_stocks(
-            tickers, 
-            process_long_term, 
-            max_workers=max_workers, 
-            max_stocks=None,  # Process all provided tickers
-            timeout_per_stock=5.0,  # Reduced timeout to 5 seconds per stock
-            progress_callback=progress_callback
-        )
-        # Sort by score and convert to Confidence Score
-        results = sorted(results, key=lambda x: x.get('_score', 0), reverse=True)
+        # Use all tickers provided, don't limit artificially.
+        # Build one multi-symbol Tickers object per batch of 50 so the
+        # fallback lookups share a session instead of one per ticker.
+        pool = list(tickers)
+        total = len(pool)
+        batch_size = 50
+        results = []
+
+        for start in range(0, total, batch_size):
+            batch = pool[start:start + batch_size]
+            full_names = {t: (f"{t}.NS" if not t.endswith(".NS") else t) for t in batch}
+            tk = yf.Tickers(list(full_names.values()))
+            # Resolve the batch's .info payloads concurrently up front (skipping
+            # caps the fast_info gate rejects); process_long_term then reads them
+            # from the Ticker objects, reusing the caps, instead of fetching one by one
+            caps = tk.prefetch_info(max_workers=16, min_market_cap=2000000000)
+
+            def process_from_batch(ticker, tk=tk, full_names=full_names, caps=caps):
+                sym = full_names[ticker]
+                return process_long_term(ticker, tk.tickers.get(sym), caps.get(sym))
+
+            results.extend(parallel_process_stocks(
+                batch,
+                process_from_batch,
+                max_workers=max_workers,
+                max_stocks=None,  # Process all provided tickers
+                timeout_per_stock=5.0,  # Reduced timeout to 5 seconds per stock
+                progress_callback=(
+                    lambda curr, tot, ticker, start=start: progress_callback(start + curr, total, ticker)
+                ) if progress_callback else None
+            ))
+        # Keep the top scores and convert to Confidence Score
+        results = heapq.nsmallest(max_results, results, key=lambda x: (-x.get('_score', 0), x['Stock Symbol']))
         for r in results:
             score = r.pop('_score', 0)
             r['Confidence Score (0–100)'] = min(100, score)
-        return results[:max_results]
+        return results
 
     @staticmethod
+    @timed_cache(SCANNER_CACHE_SECONDS, ignore=('progress_callback',))
     def get_cyclical_stocks_by_quarter(tickers, max_results_per_quarter=15, max_workers=8, progress_callback=None):
         """Cyclical stocks scanner by quarter."""
-        from performance_utils import parallel_process_stocks, batch_download_data
+        from performance_utils import pipelined_scan
         from scanner_robustness import ScannerConfig
         
-        # 1. BATCH DOWNLOAD (10 Years is heavy, but batching 300 at a time is still better)
-        # print("Downloading 10y data for Cyclical Scanner...")
-        batch_data = batch_download_data(tickers, period='10y', interval='1d')
-        
-        def process_cyclical(ticker):
+        # 1. BATCH DOWNLOAD (10 Years is heavy; pipelined so batch N+1 downloads while N is processed)
+        def process_cyclical(ticker, batch_data):
             try:
                 full_ticker = f"{ticker}.NS" if not ticker.endswith(".NS") else ticker
                 
                 # Retrieve from batch
-                df = None
-                if ticker in batch_data:
-                    df = batch_data[ticker]
-                elif full_ticker.replace('.NS', '') in batch_data:
-                    df = batch_data[full_ticker.replace('.NS', '')]
+                # pop, not get: each frame is freed as soon as its ticker is done
+                df = batch_data.pop(ticker, None)
+                if df is None:
+                    df = batch_data.pop(full_ticker.replace('.NS', ''), None)
                 
                 if df is None or df.empty or len(df) < ScannerConfig.CYCLICAL_MIN_ROWS:
                     return None
-                df['Year'] = df.index.year
-                df['Quarter'] = df.index.quarter
-                
-                quarterly_returns = {'Q1': [], 'Q2': [], 'Q3': [], 'Q4': []}
-                
-                for year in range(df['Year'].min(), df['Year'].max() + 1):
-                    for q in [1, 2, 3, 4]:
-                        q_data = df[(df['Year'] == year) & (df['Quarter'] == q)]
-                        if len(q_data) > 0:
-                            start_price = q_data['Close'].iloc[0]
-                            end_price = q_data['Close'].iloc[-1]
-                            ret = ((end_price - start_price) / start_price) * 100
-                            quarterly_returns[f'Q{q}'].append(ret)
+                quarterly_returns = _quarterly_returns(ticker, df)
                 
                 # Find best QUALIFYING quarter
                 best_q = None
@@ -808,40 +869,37 @@ class AnalysisEngine:
                 # print(f"Error processing {ticker}: {e}")
                 return None
         
-        results = parallel_process_stocks(tickers, process_cyclical, max_workers=20, max_stocks=None, timeout_per_stock=1.0, progress_callback=progress_callback)
+        results = pipelined_scan(tickers, process_cyclical, period='10y', interval='1d', max_workers=20, timeout_per_stock=1.0, progress_callback=progress_callback)
         
-        # Group by quarter
-        grouped = {'Q1': [], 'Q2': [], 'Q3': [], 'Q4': []}
+        # Group by quarter, then keep the best max_results_per_quarter of each via
+        # a bounded heap, ordered like the other scanners (score desc, then symbol)
+        groups = {'Q1': [], 'Q2': [], 'Q3': [], 'Q4': []}
         for r in results:
-            q = r.get('Quarter')
-            if q and q in grouped:
-                grouped[q].append(r)
-        
-        # Sort each quarter by score
-        for q in grouped:
-            grouped[q] = sorted(grouped[q], key=lambda x: x.get('Score', 0), reverse=True)[:max_results_per_quarter]
-        
-        return grouped
+            group = groups.get(r.get('Quarter'))
+            if group is not None:
+                group.append(r)
+
+        return {
+            q: heapq.nsmallest(max_results_per_quarter, group, key=lambda x: (-x.get('Score', 0), x['Stock Symbol']))
+            for q, group in groups.items()
+        }
 
     @staticmethod
     def get_weinstein_scanner_stocks(tickers, max_workers=8, progress_callback=None):
         """Weinstein Stage Analysis scanner."""
-        from performance_utils import parallel_process_stocks, batch_download_data
+        from performance_utils import pipelined_scan
         from scanner_robustness import ScannerConfig
         
-        # 1. BATCH DOWNLOAD
-        batch_data = batch_download_data(tickers, period=ScannerConfig.WEINSTEIN_PERIOD, interval='1d')
-        
-        def process_weinstein(ticker):
+        # 1. BATCH DOWNLOAD (pipelined with processing, see pipelined_scan)
+        def process_weinstein(ticker, batch_data):
             try:
                 full_ticker = f"{ticker}.NS" if not ticker.endswith(".NS") else ticker
                 
                 # Retrieve from batch
-                df = None
-                if ticker in batch_data:
-                    df = batch_data[ticker]
-                elif full_ticker.replace('.NS', '') in batch_data:
-                    df = batch_data[full_ticker.replace('.NS', '')]
+                # pop, not get: each frame is freed as soon as its ticker is done
+                df = batch_data.pop(ticker, None)
+                if df is None:
+                    df = batch_data.pop(full_ticker.replace('.NS', ''), None)
                 
                 if df is None or df.empty or len(df) < ScannerConfig.WEINSTEIN_MIN_ROWS:
                     return None
@@ -885,32 +943,27 @@ class AnalysisEngine:
                 # print(f"Error processing {ticker}: {e}")
                 return None
         
-        results = parallel_process_stocks(tickers, process_weinstein, max_workers=20, max_stocks=None, timeout_per_stock=1.0, progress_callback=progress_callback)
+        results = pipelined_scan(tickers, process_weinstein, period=ScannerConfig.WEINSTEIN_PERIOD, interval='1d', max_workers=20, timeout_per_stock=1.0, progress_callback=progress_callback)
         
         # Group by stage
-        grouped = {
-            "Stage 1 - Basing": [],
-            "Stage 2 - Advancing": [],
-            "Stage 3 - Top": [],
-            "Stage 4 - Declining": []
-        }
+        grouped = {stage: [] for stage in WEINSTEIN_STAGES}
         
         for r in results:
-            stage = r.pop('_stage', None)
-            if stage and stage in grouped:
-                grouped[stage].append(r)
+            bucket = grouped.get(r.pop('_stage', None))
+            if bucket is not None:
+                bucket.append(r)
         
         return grouped
 
     def get_news(self):
         try:
-            return yf.Ticker(self.ticker).news
+            return yf.ticker(self.ticker).news
         except:
             return []
 
     def get_financials(self):
         try:
-            info = yf.Ticker(self.ticker).info
+            info = yf.ticker(self.ticker).info
             if info:
                 return {
                     'market_cap': info.get('marketCap', 'N/A'),
@@ -1,25 +1,33 @@
 import streamlit as st
 import streamlit.components.v1 as components
-
-# Keep Streamlit awake by triggering events in the browser repeatedly
-components.html(
-    '''
-    <script>
-    setInterval(function() {
-        window.parent.postMessage('ping', '*');
-    }, 60000);
-    </script>
-    ''',
-    width=0,
-    height=0,
-)
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from analysis_engine import AnalysisEngine
+from chart_utils import (
+    downsample_ohlcv, lttb_series, candle_segments, histogram_segments,
+    MAX_CHART_POINTS, CANDLE_GL_THRESHOLD,
+)
+from app_config import (
+    TIMEFRAMES, DEFAULT_TIMEFRAME_INDEX, PERIODS, DEFAULT_MODEL,
+    TAB_TITLES, QUARTER_TAB_TITLES, STAGE_TAB_TITLES, SCAN_SIDE, MULTI_SCAN_SIZE, MULTI_SCAN_TOP_K,
+    MAX_SCAN_DEPTH,
+    APP_CSS, KEEP_ALIVE_JS,
+)
+from performance_utils import cached_batch_download, get_http_session
 import pandas as pd
+import numpy as np
 from datetime import datetime
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
 import hashlib
 import time
+import bisect
+import io
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 try:
     from zoneinfo import ZoneInfo
@@ -100,100 +108,129 @@ CACHE_BUSTER = hashlib.md5(str(time.time()).encode()).hexdigest()[:8]
 # Add cache buster to title
 st.title(f"🚀 Stock Market AI Agent - v2.0")
 
-# Custom CSS for "Premium" look (v2.1)
-st.markdown(f"""
-    <style>
-    .main {{
-        background-color: #0e1117;
-    }}
-    .stMetric {{
-        background: rgba(255, 255, 255, 0.05);
-        padding: 15px;
-        border-radius: 10px;
-        border: 1px solid rgba(255, 255, 255, 0.1);
-    }}
-    .status-card {{
-        padding: 20px;
-        border-radius: 12px;
-        margin-bottom: 15px;
-        border: 1px solid rgba(255, 255, 255, 0.1);
-    }}
-    .bullish {{ background-color: rgba(16, 185, 129, 0.1); border-left: 5px solid #10b981; }}
-    .bearish {{ background-color: rgba(239, 68, 68, 0.1); border-left: 5px solid #ef4444; }}
-    .sideways {{ background-color: rgba(107, 114, 128, 0.1); border-left: 5px solid #6b7280; }}
-    
-    /* Wrap tab text */
-    button[data-baseweb="tab"] p {{
-        white-space: normal !important;
-        text-align: center !important;
-        line-height: 1.2 !important;
-        font-size: 14px !important;
-    }}
-    button[data-baseweb="tab"] {{
-        height: auto !important;
-        min-height: 40px !important;
-        padding-top: 5px !important;
-        padding-bottom: 5px !important;
-    }}
-    
-    /* New UI element styling */
-    .version-tag {{
-        background-color: #10b981;
-        color: white;
-        padding: 4px 8px;
-        border-radius: 4px;
-        font-size: 0.8rem;
-        font-weight: bold;
-    }}
-    </style>
-    """, unsafe_allow_html=True)
+# Recommendation card per market bias (native alert boxes instead of HTML classes)
+BIAS_CONTAINER = {"Bullish": st.success, "Bearish": st.error, "Sideways": st.info}
+
+
+def inject_static_assets():
+    """Emit the page CSS and keep-alive ping.
+
+    Both are app_config constants, built once per process. This must
+    still run on every rerun: Streamlit drops any element a rerun doesn't
+    re-emit, so a run-once guard would strip the styles and stop the ping.
+    Identical deltas are deduplicated by the frontend.
+    """
+    st.markdown(APP_CSS, unsafe_allow_html=True)
+    components.html(KEEP_ALIVE_JS, width=0, height=0)
+
+
+inject_static_assets()
 
 # --- App Configuration ---
 # UI and analysis settings for the Stock Market AI Agent.
 
-# Fetch NSE stock list
-@st.cache_data
+DEFAULT_STOCK = "RELIANCE - RELIANCE INDUSTRIES LTD"
+
+
+def _with_options(stocks):
+    """(symbol map, sorted selectbox options, index of DEFAULT_STOCK or 0)."""
+    options = tuple(sorted(stocks))
+    idx = bisect.bisect_left(options, DEFAULT_STOCK)
+    default_idx = idx if idx < len(options) and options[idx] == DEFAULT_STOCK else 0
+    return stocks, options, default_idx
+
+
+NSE_LIST_URL = "https://archives.nseindia.com/content/equities/EQUITY_L.csv"
+NSE_LIST_CACHE_DIR = Path("scanner_cache") / "nse"
+# Snapshot of EQUITY_L.csv shipped with the repo, used when NSE is unreachable
+NSE_LIST_BUNDLED = Path(__file__).resolve().parent.parent / "nse_stocks.csv"
+
+
+def _load_nse_list():
+    """EQUITY_L.csv, read from today's disk copy when present so cold starts skip NSE."""
+    cache_file = NSE_LIST_CACHE_DIR / f"equity_l-{datetime.now():%Y%m%d}.csv"
+    if cache_file.exists():
+        try:
+            return pd.read_csv(cache_file)
+        except Exception:
+            pass
+
+    # Short connect/read timeouts and retries via the shared session, so a slow
+    # NSE archive fails over to the fallback list instead of stalling startup
+    try:
+        resp = get_http_session().get(NSE_LIST_URL, headers={'User-Agent': 'Mozilla/5.0'}, timeout=(3, 5))
+        resp.raise_for_status()
+        df = pd.read_csv(io.BytesIO(resp.content), usecols=['SYMBOL', 'NAME OF COMPANY', ' ISIN NUMBER'])
+    except Exception as e:
+        # Newest earlier download if there is one, else the bundled snapshot
+        previous = sorted(NSE_LIST_CACHE_DIR.glob("equity_l-*.csv"))
+        fallback = previous[-1] if previous else NSE_LIST_BUNDLED
+        print(f"⚠️ NSE stock list download failed ({e}); using {fallback}")
+        return pd.read_csv(fallback, usecols=['SYMBOL', 'NAME OF COMPANY']).drop_duplicates(subset=['SYMBOL'])
+    df = df.drop_duplicates(subset=[' ISIN NUMBER'], keep='first')
+    try:
+        NSE_LIST_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Keep only today's copy (daily TTL)
+        for stale in NSE_LIST_CACHE_DIR.glob("equity_l-*.csv"):
+            stale.unlink(missing_ok=True)
+        df[['SYMBOL', 'NAME OF COMPANY']].to_csv(cache_file, index=False)
+    except Exception as e:
+        print(f"⚠️ Could not cache NSE stock list: {e}")
+    return df
+
+
+# Fetch NSE stock list (refreshed daily)
+@st.cache_data(ttl=86400, show_spinner=False)
 def get_nse_stocks():
     try:
-        url = "https://archives.nseindia.com/content/equities/EQUITY_L.csv"
-        df = pd.read_csv(url)
-        df = df.drop_duplicates(subset=[' ISIN NUMBER'], keep='first')
-        stocks = {f"{row['SYMBOL']} - {row['NAME OF COMPANY']}": row['SYMBOL'] for _, row in df.iterrows()}
-        return stocks
+        df = _load_nse_list()
+        # ✅ Vectorized: build keys column-wise instead of a Series per row via iterrows
+        symbols = df['SYMBOL'].astype(str)
+        keys = (symbols + ' - ' + df['NAME OF COMPANY'].astype(str)).tolist()
+        stocks = dict(zip(keys, symbols.tolist()))
+        return _with_options(stocks)
     except Exception as e:
         st.error(f"Error fetching NSE stock list: {e}")
-        return {"RELIANCE - RELIANCE INDUSTRIES LTD": "RELIANCE"}
+        return _with_options({DEFAULT_STOCK: "RELIANCE"})
+
+TRADINGVIEW_CHART_URL = "https://www.tradingview.com/chart/?symbol=NSE:"
+
+# Shared st.dataframe column configs for linked scanner tables, built once
+LINK_COLUMN_CONFIG = {"Stock Symbol": st.column_config.LinkColumn("Stock Symbol", display_text="symbol=NSE:(.*)")}
+SCORED_LINK_COLUMN_CONFIG = {**LINK_COLUMN_CONFIG, "Score": None, "pct_change": None}
+
 
 def add_tradingview_column(results):
-    """Transforms the Stock Symbol column into a TradingView URL for clickable rows."""
-    if not results: return results
-    # Work on a copy to avoid side effects if reused
-    processed = []
-    for res in results:
-        new_res = res.copy()
-        # Standardize key
-        key = 'Stock Symbol' if 'Stock Symbol' in new_res else ('ticker' if 'ticker' in new_res else None)
-        if not key: 
-            processed.append(new_res)
-            continue
-            
-        symbol = new_res.get(key)
-        if symbol:
-            # If already a URL, don't double wrap
-            if "tradingview.com" in str(symbol):
-                new_res['Stock Symbol'] = symbol
-            else:
-                clean_symbol = str(symbol).replace(".NS", "")
-                new_res['Stock Symbol'] = f"https://www.tradingview.com/chart/?symbol=NSE:{clean_symbol}"
-            
-            # Remove old key if it was 'ticker'
-            if key == 'ticker':
-                new_res.pop('ticker', None)
-        processed.append(new_res)
-    return processed
+    """Scanner rows (list of dicts or DataFrame) -> DataFrame for st.dataframe.
 
-nse_stocks_dict = get_nse_stocks()
-stock_options = sorted(list(nse_stocks_dict.keys()))
+    The symbol column ('Stock Symbol', else 'ticker') becomes a 'Stock Symbol'
+    column of TradingView chart URLs, built with vectorized string ops.
+    """
+    df = results.copy() if isinstance(results, pd.DataFrame) else pd.DataFrame(results)
+    key = 'Stock Symbol' if 'Stock Symbol' in df.columns else ('ticker' if 'ticker' in df.columns else None)
+    if key is None or df.empty:
+        return df
+
+    symbols = df[key]
+    text = symbols.astype(str)
+    # Empty symbols and existing links are left as they are (no double wrap)
+    to_link = symbols.notna() & (text != '') & ~text.str.contains('tradingview.com', regex=False)
+    links = symbols.mask(to_link, TRADINGVIEW_CHART_URL + text.str.replace('.NS', '', regex=False))
+    if key == 'ticker':
+        df = df.drop(columns=['ticker'])
+    df['Stock Symbol'] = links
+    return df
+
+nse_stocks_dict, stock_options, default_stock_idx = get_nse_stocks()
+
+# Immutable scanner universe shared by every tab; cache_resource hands back the
+# same tuple each rerun instead of re-listing ~2000 symbols (refreshed with the list)
+@st.cache_resource(ttl=86400, show_spinner=False)
+def get_ticker_universe(_stocks):
+    return tuple(_stocks.values())
+
+ALL_TICKERS = get_ticker_universe(nse_stocks_dict)
+TOP_NSE_TICKERS = ALL_TICKERS[:MULTI_SCAN_SIZE]
 
 # Sidebar
 st.sidebar.title("🛠️ Agent")
@@ -214,14 +251,9 @@ if filter_text:
 else:
     filtered_options = stock_options
 
-# Index logic: Try to keep previous selection if still in list, else default to 0
-current_index = 0
-default_stock = "RELIANCE - RELIANCE INDUSTRIES LTD"
-
-# If we have a filter, and the default stock is in it, maybe use that? 
-# Or just default to 0 (top result) which is usually what user wants after typing.
-if not filter_text and default_stock in filtered_options:
-    current_index = filtered_options.index(default_stock)
+# Index logic: default stock on the full list (precomputed with the list),
+# top result (0) after typing, which is usually what user wants.
+current_index = 0 if filter_text else default_stock_idx
 
 selected_stock_str = st.sidebar.selectbox("Select Stock", 
                                         options=filtered_options,
@@ -232,14 +264,15 @@ if selected_stock_str == "No matching stocks found":
     st.warning("No stock matches your search.")
     # Fallback to avoid crash?
     # Maybe don't run analysis yet
-    ticker = None
+    ticker = clean_ticker = None
 else:
     # Get the symbol from the selected string and add .NS for Yahoo Finance
-    ticker = f"{nse_stocks_dict[selected_stock_str]}.NS"
+    clean_ticker = nse_stocks_dict[selected_stock_str]
+    ticker = f"{clean_ticker}.NS"
 
 timeframe = st.sidebar.selectbox("Timeframe", 
-    options=["1m", "5m", "15m", "1h", "4h", "1d", "1wk", "1mo"],
-    index=5) # Default to 1d
+    options=TIMEFRAMES,
+    index=DEFAULT_TIMEFRAME_INDEX) # Default to 1d
 
 import os
 from dotenv import load_dotenv
@@ -256,7 +289,7 @@ except:
 
 # Default AI settings (hidden from UI)
 use_ai = True
-selected_model = "gpt-5-nano-2025-08-07"
+selected_model = DEFAULT_MODEL
 
 # Scanner Performance Configuration (hidden from UI)
 max_workers = 25  # Increased for batch processing
@@ -264,7 +297,7 @@ max_scan_stocks = 2000 # Increased to support 1500+ stocks per user request
 
 # --- Scanner controls (user-configurable) ---
 st.sidebar.header("Scanner Controls")
-scan_depth = st.sidebar.number_input("Scan Depth (max tickers)", min_value=50, max_value=2500, value=1500, step=50)
+scan_depth = st.sidebar.number_input("Scan Depth (max tickers)", min_value=50, max_value=MAX_SCAN_DEPTH, value=1500, step=50)
 min_mcap_cr = st.sidebar.selectbox("Min Market Cap (in Crore ₹)", options=[0, 100, 250, 500, 1000, 5000], index=4, help="Filter out small caps to speed scans and avoid noisy data")
 min_market_cap_value = int(min_mcap_cr * 1e7)  # Convert Crore to rupees (1 Cr = 1e7)
 
@@ -272,42 +305,301 @@ min_market_cap_value = int(min_mcap_cr * 1e7)  # Convert Crore to rupees (1 Cr =
 # We will use this dynamically for all scanners.
 
 
-# Periods for indicators (Capped at yfinance limits for stability)
-periods = {
-    "1m": "7d", "5m": "30d", "15m": "60d", "1h": "730d", 
-    "4h": "730d", "1d": "max", "1wk": "max", "1mo": "max"
-}
+
+# One engine (download + indicators) per (ticker, interval, period), reused across
+# reruns. cache_resource hands back the same object (no pickling of the frame);
+# analyze() memoizes on the engine, so cache hits skip indicator work entirely.
+@st.cache_resource(ttl=300, max_entries=32, show_spinner="Fetching market data...")
+def get_engine(ticker, interval, period):
+    engine = AnalysisEngine(ticker, interval=interval, period=period)
+    analysis = engine.analyze()
+    # From here the frame only feeds display code; float32 halves the memory of
+    # every cached engine and the bytes of anything rendered from it
+    float_cols = engine.data.select_dtypes(include='float64').columns
+    engine.data = engine.data.astype({c: 'float32' for c in float_cols})
+    return engine, analysis
+
+def normalize_news(news):
+    """yfinance news items (old or new layout) -> [(title, link, publisher, date_str)]."""
+    if not news:
+        return []
+    # Flatten old/new yfinance news structures in one pass
+    rows = []
+    for item in news:
+        content = item.get('content') or {}
+        rows.append((
+            content.get('title', item.get('title', 'Market Update')),
+            (content.get('canonicalUrl') or {}).get('url', item.get('link', '#')),
+            (content.get('provider') or {}).get('displayName', item.get('publisher', 'Financial News')),
+            content.get('pubDate', item.get('pubDate')),
+        ))
+    titles, links, publishers, pub_times = zip(*rows)
+
+    # ✅ Format all timestamps at once: epoch seconds or ISO strings
+    raw_times = pd.Series(pub_times, dtype=object)
+    epoch = pd.to_numeric(raw_times, errors='coerce')
+    parsed = pd.to_datetime(epoch, unit='s', utc=True, errors='coerce').fillna(
+        pd.to_datetime(raw_times.where(epoch.isna()), utc=True, errors='coerce'))
+    date_strs = (parsed.dt.strftime('%Y-%m-%d %H:%M')
+                 .fillna(raw_times.astype(str).str[:16])
+                 .where(raw_times.notna(), ''))
+    return list(zip(titles, links, publishers, date_strs))
+
+
+# Yahoo lookups behind tabs 4/5, keyed on ticker. Every tab body runs on every
+# rerun, so uncached these re-fetched .info and .news on each interaction.
+# The two requests are independent and are issued concurrently; news is cached
+# already normalized for display.
+@st.cache_data(ttl=600, show_spinner=False)
+def get_stock_details(ticker, _engine):
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        fin = executor.submit(_engine.get_financials)
+        news = executor.submit(_engine.get_news)
+        fin, news = fin.result(), news.result()
+    try:
+        return fin, normalize_news(news)
+    except Exception as e:
+        # Malformed news must not take the financials tab down with it
+        print(f"⚠️ Could not normalize news for {ticker}: {e}")
+        return fin, []
+
+# One DB manager (SQLAlchemy engine + pool, or local store) per process instead
+# of a new one per scanner tab on every rerun
+@st.cache_resource(show_spinner=False)
+def get_db():
+    return get_db_manager()
+
+
+# Stored scanner results per scanner type; cleared whenever a scan saves new ones
+@st.cache_data(ttl=60, show_spinner=False)
+def get_stored_results(kind):
+    return get_db().get_results(kind)
+
+
+# Tab 1 options/Fibonacci panels: pure functions of the engine's frame and
+# analysis, so computed once per (ticker, timeframe, last bar)
+@st.cache_data(ttl=300, max_entries=32, show_spinner=False)
+def technical_extras(ticker, timeframe, last_bar, _engine, _analysis):
+    return _engine.get_options_suggestion(_analysis), _engine.get_fibonacci_levels()
+
+
+# Stage audit panel: stage analysis plus its Minervini / CPR tables, built once
+# per (ticker, timeframe, last bar); None when history is too short
+@st.cache_data(ttl=300, max_entries=32, show_spinner=False)
+def stage_audit(ticker, timeframe, last_bar, _engine):
+    stage_data = _engine.get_stage_analysis()
+    if not stage_data:
+        return None
+    minervini = stage_data['minervini']
+    minervini_table = pd.DataFrame({
+        "Criteria": list(minervini.keys()),
+        "Met": ["✅" if met else "❌" for met in minervini.values()]
+    }).set_index("Criteria")
+    cpr = stage_data['cpr']
+    cpr_table = pd.DataFrame({
+        "Metric": ["CPR Width", "CPR Type", "IB (Range)"],
+        "Value": [cpr['width'], cpr['type'], str(cpr['range'])]
+    }).set_index("Metric")
+    return minervini_table, stage_data['weinstein'], cpr_table
+
+
+# Stored flat scanner results (smc / swing / long_term) as a display-ready frame,
+# normalized and linked once per stored set instead of on every rerun
+@st.cache_data(ttl=60, show_spinner=False)
+def stored_results_table(kind):
+    rows, last_updated = get_stored_results(kind)
+    if not rows:
+        return None, last_updated
+    try:
+        norm = normalize_scanner_results(kind, rows) if normalize_scanner_results else rows
+    except Exception:
+        norm = rows
+    return _to_arrow(add_tradingview_column(norm)), last_updated
+
+
+def _to_arrow(df):
+    """Display frame -> Arrow table, so st.dataframe skips its per-rerun pandas conversion.
+
+    Used on cached tables; falls back to the DataFrame when pyarrow is missing
+    or a column mixes types Arrow can't infer (e.g. 'N/A' next to floats).
+    """
+    if pa is None:
+        return df
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, ValueError):
+        return df
+
+
+def group_tables(kind, groups):
+    """Display frames per group (cyclical quarters, Weinstein stages); None for empty groups."""
+    tables = {}
+    for name, rows in groups.items():
+        if not rows:
+            tables[name] = None
+            continue
+        try:
+            norm = normalize_scanner_results(kind, rows) if normalize_scanner_results else rows
+        except Exception:
+            norm = rows
+        tables[name] = _to_arrow(add_tradingview_column(norm))
+    return tables
+
+
+# Stored grouped results as display frames, built once per stored set
+@st.cache_data(ttl=60, show_spinner=False)
+def stored_group_tables(kind):
+    groups, last_updated = get_stored_results(kind)
+    return (group_tables(kind, groups) if groups else None), last_updated
+
+
+def make_progress_callback(progress_bar, status_text, start_time):
+    """Scanner progress_callback(current, total, ticker) driving a bar and a status line."""
+    def update_progress(current, total, ticker):
+        # Throttle to ~20 frontend updates per scan
+        if current % max(1, total // 20) and current != total:
+            return
+        progress_bar.progress(current / total)
+        elapsed = time.time() - start_time
+        rate = current / elapsed if elapsed > 0 else 0
+        eta = (total - current) / rate if rate > 0 else 0
+        status_text.text(f"Scanned {current}/{total} stocks ({rate:.1f} stocks/sec) - ETA: {eta:.0f}s - Last: {ticker}")
+    return update_progress
+
+
+def clear_stored_results():
+    """Drop cached stored results after a scan saves a new set."""
+    get_stored_results.clear()
+    stored_results_table.clear()
+    stored_group_tables.clear()
+
+
+# Tab 3 table: last 100 rows, rebuilt only when a new bar arrives. Numeric columns
+# only, all-NaN indicator warm-ups dropped, floats as rounded float32 (half the
+# Arrow bytes); Volume stays integer
+@st.cache_data(ttl=300, max_entries=16, show_spinner=False)
+def tail_view(ticker, timeframe, last_bar, _df, rows=100):
+    view = _df.tail(rows)
+    view = view.drop(columns=[c for c in view.columns if str(c).startswith('_')])
+    view = view.select_dtypes(include='number').dropna(axis=1, how='all')
+    floats = view.select_dtypes(include='float').columns
+    return view.astype({c: 'float32' for c in floats}).round(4)
+
+def build_figure(df, ic, timeframe):
+    """Build the 3-pane Price / RSI / MACD figure for tab 1."""
+    # ✅ Send only the plotted columns, and cap points sent to the browser:
+    # intraday shows the most recent window at full resolution, longer
+    # timeframes are bucket-aggregated over the whole history
+    plot_cols = [c for c in ('Open', 'High', 'Low', 'Close', 'EMA_9', 'EMA_21',
+                             ic['rsi'], ic['macd'], ic['macdh'], ic['macds'])
+                 if c in df.columns]
+    plot_df = df[plot_cols].dropna(how='all')
+    if timeframe in ('1m', '5m', '15m'):
+        plot_df = plot_df.iloc[-MAX_CHART_POINTS:]
+    chart_df = downsample_ohlcv(plot_df)
+
+    # float32 arrays, converted once: plotly's typed-array encoding ships 4 bytes
+    # per point instead of 8, and traces skip the Series -> array step
+    x = chart_df.index
+    cols = {c: chart_df[c].to_numpy(dtype=np.float32)
+            for c in ('Open', 'High', 'Low', 'Close', ic['macdh']) if c in chart_df.columns}
+
+    # (column, subplot row, name, line style) for every line trace
+    line_traces = (
+        ('EMA_9', 1, 'EMA 9', dict(color='cyan', width=1)),
+        ('EMA_21', 1, 'EMA 21', dict(color='orange', width=1)),
+        (ic['rsi'], 2, 'RSI', dict(color='purple')),
+        (ic['macd'], 3, 'MACD', dict(color='blue')),
+        (ic['macds'], 3, 'Signal', dict(color='yellow')),
+    )
+
+    # Explicitly defined plot heights and subplots
+    fig = make_subplots(rows=3, cols=1, shared_xaxes=True, 
+                       vertical_spacing=0.05, 
+                       subplot_titles=('Price', 'RSI', 'MACD'),
+                       row_heights=[0.6, 0.2, 0.2])
+
+    # Price: SVG candles for short series; long ones as WebGL wick/body segments
+    # (4 draw calls total instead of one SVG path per bar)
+    if len(chart_df) > CANDLE_GL_THRESHOLD:
+        segments = candle_segments(x, cols['Open'], cols['High'], cols['Low'], cols['Close'])
+        for side, color in (('up', '#3D9970'), ('down', '#FF4136')):
+            xs, wicks, bodies = segments[side]
+            fig.add_trace(go.Scattergl(x=xs, y=wicks, mode='lines', line=dict(color=color, width=1),
+                                       name='Price', hoverinfo='skip'), row=1, col=1)
+            fig.add_trace(go.Scattergl(x=xs, y=bodies, mode='lines', line=dict(color=color, width=4),
+                                       name='Price'), row=1, col=1)
+    else:
+        fig.add_trace(go.Candlestick(x=x, open=cols['Open'], high=cols['High'], low=cols['Low'], close=cols['Close'], name='Price'), row=1, col=1)
+
+    # MACD histogram shares the bucketed x axis with the candles; long series
+    # are drawn as WebGL segments like the candles
+    if ic['macdh'] in cols:
+        if len(chart_df) > CANDLE_GL_THRESHOLD:
+            bars = histogram_segments(x, cols[ic['macdh']])
+            for side, color in (('up', '#3D9970'), ('down', '#FF4136')):
+                hx, hy = bars[side]
+                fig.add_trace(go.Scattergl(x=hx, y=hy, mode='lines', line=dict(color=color, width=2),
+                                           name='Hist'), row=3, col=1)
+        else:
+            fig.add_trace(go.Bar(x=x, y=cols[ic['macdh']], name='Hist'), row=3, col=1)
+
+    # Line traces on WebGL (one canvas) instead of SVG paths. Each is reduced with
+    # LTTB from the full-resolution window, which keeps peaks/troughs that bucket
+    # 'last' would drop
+    for col, row, name, style in line_traces:
+        if col not in plot_df.columns:
+            continue
+        lx, ly = lttb_series(plot_df[col])
+        if col == ic['rsi']:
+            ly = np.round(ly, 2)
+        fig.add_trace(go.Scattergl(x=lx, y=ly, line=style, name=name), row=row, col=1)
+
+    # RSI bands
+    if ic['rsi'] in plot_df.columns:
+        fig.add_hline(y=70, line_dash="dash", line_color="red", row=2, col=1)
+        fig.add_hline(y=30, line_dash="dash", line_color="green", row=2, col=1)
+
+    fig.update_layout(height=900, template='plotly_dark', showlegend=False, xaxis_rangeslider_visible=False)
+    return fig
 
 # Add TradingView link for the selected stock
-clean_header_ticker = ticker.replace(".NS", "")
-st.markdown(f"### Analyzing: {selected_stock_str} | [View Chart 📈](https://www.tradingview.com/chart/?symbol=NSE:{clean_header_ticker})")
+if ticker:
+    st.markdown(f"### Analyzing: {selected_stock_str} | [View Chart 📈]({TRADINGVIEW_CHART_URL}{clean_ticker})")
 
 # Version indicator
 st.markdown("#### App Version: 2.1 - Updated UI")
 
+# Per-stock engine; only tabs 1-5 and the stage audit depend on it, so a failed
+# fetch (or no matching stock) no longer takes the market-wide scanners down too
+engine = analysis = df = None
+engine_error = None
 if ticker:
     try:
-        engine = AnalysisEngine(ticker, interval=timeframe, period=periods[timeframe])
-        analysis = engine.analyze()
+        engine, analysis = get_engine(ticker, timeframe, PERIODS[timeframe])
         df = engine.data
-        
-        # Tabs structure consolidated to fix blank tab issues
-        tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9, tab10, tab11, tab12 = st.tabs([
-            "📊 Agent Analysis", 
-            "🤖 AI Insights", 
-            "📈 Technical Charts", 
-            "🏢 Financials", 
-            "🔗 Related Info", 
-            "🚀 Agent Recommendations",
-            "💹 Smart Money Concept",
-            "🎯 Swing Trading (15–20 Days)",
-            "⏳ Long Term Investing",
-            "🗓️ Cyclical Stocks by Quarter",
-            "📌 Stage Analysis",
-            "📊 15-Day History"
-        ])
-        
-        with tab1:
+    except Exception as e:
+        engine_error = e
+
+
+def stock_view_ready():
+    """True if the selected stock's data loaded; otherwise say why not."""
+    if engine is not None:
+        return True
+    if engine_error is not None:
+        st.error(f"Error fetching data for {ticker}: {str(engine_error)}")
+    else:
+        st.info("Enter a Ticker Symbol in the sidebar to start analysis.")
+    return False
+
+
+try:
+    # Radio-driven panels instead of st.tabs: tabs execute every body on every
+    # rerun, whereas only the selected panel's code runs here
+    active_view = st.radio("View", TAB_TITLES, horizontal=True, label_visibility="collapsed", key="active_view")
+    
+    if active_view == TAB_TITLES[0]:
+        if stock_view_ready():
             # Header Metrics
             col1, col2, col3, col4 = st.columns(4)
             col1.metric("Current Price", f"₹{analysis['price']:.2f}")
@@ -316,15 +608,12 @@ if ticker:
             col4.metric("Probability", analysis['probability'])
             
             # Recommendations Card
-            bias_class = analysis['bias'].lower()
-            st.markdown(f"""
-                <div class="status-card {bias_class}">
-                    <h3>Trade Recommendation: {analysis['recommendation']}</h3>
-                    <p><b>Entry Zone:</b> ₹{analysis['price']:.2f} - ₹{analysis['price']*1.01:.2f}</p>
-                    <p><b>Targets:</b> T1: ₹{analysis['targets'][0]} | T2: ₹{analysis['targets'][1]}</p>
-                    <p><b>Stop Loss:</b> ₹{analysis['stop_loss']}</p>
-                </div>
-            """, unsafe_allow_html=True)
+            BIAS_CONTAINER.get(analysis['bias'], st.info)(
+                f"### Trade Recommendation: {analysis['recommendation']}\n\n"
+                f"**Entry Zone:** ₹{analysis['price']:.2f} - ₹{analysis['price']*1.01:.2f}  \n"
+                f"**Targets:** T1: ₹{analysis['targets'][0]} | T2: ₹{analysis['targets'][1]}  \n"
+                f"**Stop Loss:** ₹{analysis['stop_loss']}"
+            )
 
             # --- Chart Rendering ---
             st.subheader(f"📈 {selected_stock_str} Price Action")
@@ -333,44 +622,26 @@ if ticker:
                 st.warning("Insufficient data for this timeframe. Try a larger period.")
             else:
                 try:
-                    # Explicitly defined plot heights and subplots
-                    fig = make_subplots(rows=3, cols=1, shared_xaxes=True, 
-                                       vertical_spacing=0.05, 
-                                       subplot_titles=('Price', 'RSI', 'MACD'),
-                                       row_heights=[0.6, 0.2, 0.2])
-
-                    # Price
-                    fig.add_trace(go.Candlestick(x=df.index, open=df['Open'], high=df['High'], low=df['Low'], close=df['Close'], name='Price'), row=1, col=1)
-                    
-                    if 'EMA_9' in df.columns:
-                        fig.add_trace(go.Scatter(x=df.index, y=df['EMA_9'], line=dict(color='cyan', width=1), name='EMA 9'), row=1, col=1)
-                    if 'EMA_21' in df.columns:
-                        fig.add_trace(go.Scatter(x=df.index, y=df['EMA_21'], line=dict(color='orange', width=1), name='EMA 21'), row=1, col=1)
-
-                    # RSI
-                    if engine.indicator_cols['rsi'] in df.columns:
-                        fig.add_trace(go.Scatter(x=df.index, y=df[engine.indicator_cols['rsi']], line=dict(color='purple'), name='RSI'), row=2, col=1)
-                        fig.add_hline(y=70, line_dash="dash", line_color="red", row=2, col=1)
-                        fig.add_hline(y=30, line_dash="dash", line_color="green", row=2, col=1)
-
-                    # MACD
-                    ic = engine.indicator_cols
-                    if ic['macd'] in df.columns:
-                        fig.add_trace(go.Bar(x=df.index, y=df[ic['macdh']], name='Hist'), row=3, col=1)
-                        fig.add_trace(go.Scatter(x=df.index, y=df[ic['macd']], line=dict(color='blue'), name='MACD'), row=3, col=1)
-                        fig.add_trace(go.Scatter(x=df.index, y=df[ic['macds']], line=dict(color='yellow'), name='Signal'), row=3, col=1)
-
-                    fig.update_layout(height=900, template='plotly_dark', showlegend=False, xaxis_rangeslider_visible=False)
-                    st.plotly_chart(fig, use_container_width=True)
+                    # ✅ Rebuild the figure only when the data changes, not on every rerun.
+                    # The engine identity changes on each get_engine refresh, and the
+                    # last bar's OHLC catches a forming candle updating in place
+                    last_bar = df[['Open', 'High', 'Low', 'Close']].iloc[-1]
+                    fig_key = (ticker, timeframe, id(engine), len(df), df.index[-1], tuple(last_bar.tolist()))
+                    if st.session_state.get('fig_key') != fig_key:
+                        st.session_state['fig'] = build_figure(df, engine.indicator_cols, timeframe)
+                        st.session_state['fig_key'] = fig_key
+                    fig = st.session_state['fig']
+                    st.plotly_chart(fig, use_container_width=True, key="price_chart")
                 except Exception as e:
                     st.error(f"Chart Render Failed: {e}")
-                    st.line_chart(df['Close'])
+                    st.line_chart(df['Close'].iloc[-MAX_CHART_POINTS:])
+
+            opt, fib = technical_extras(ticker, timeframe, df.index[-1], engine, analysis)
 
             # Options & Risk panel
             c1, c2 = st.columns(2)
             with c1:
                 st.write("### 🧪 Options Strategy")
-                opt = engine.get_options_suggestion(analysis)
                 st.write(f"**Strategy:** {opt['strategy']}")
                 st.write(f"**Strike:** {opt['strike_logic']}")
                 st.write(f"**Expiry:** {opt['expiry']}")
@@ -381,13 +652,13 @@ if ticker:
 
             # Technical Expansion
             with st.expander("📐 Technical Deep Dive"):
-                fib = engine.get_fibonacci_levels()
                 st.write("#### Fibonacci Levels")
                 f_cols = st.columns(len(fib))
                 for i, (l, v) in enumerate(fib.items()):
                     f_cols[i].metric(l, f"₹{v:.2f}")
 
-        with tab2:
+    if active_view == TAB_TITLES[1]:
+        if stock_view_ready():
             st.subheader("🤖 AI Driven Analysis & Outlook")
             
             # Moved technical reasoning here to keep Tab 1 original
@@ -397,7 +668,9 @@ if ticker:
                     
             if use_ai:
                 analysis['ticker'] = ticker
-                if st.button("🧠 Generate AI Insight"):
+                with st.form("ai_insight_form", border=False):
+                    ai_submitted = st.form_submit_button("🧠 Generate AI Insight")
+                if ai_submitted:
                     with st.spinner(f"Agent {selected_model} is thinking..."):
                         insight = AnalysisEngine.get_ai_insight(analysis, MODEL_URL, MODEL_KEY, selected_model)
                         st.info(insight)
@@ -406,13 +679,15 @@ if ticker:
             else:
                 st.warning("Please enable AI Reasoning in the sidebar to see AI Insights.")
 
-        with tab3:
+    if active_view == TAB_TITLES[2]:
+        if stock_view_ready():
             st.subheader("Raw Data & Indicators")
-            st.dataframe(df.tail(100))
+            st.dataframe(tail_view(ticker, timeframe, df.index[-1], df), use_container_width=True)
 
-        with tab4:
+    if active_view == TAB_TITLES[3]:
+        if stock_view_ready():
             st.subheader("Company Financials & Earnings")
-            fin = engine.get_financials()
+            fin, _ = get_stock_details(ticker, engine)
             if fin:
                 c1, c2, c3 = st.columns(3)
                 c1.metric("Market Cap", f"₹{fin['market_cap']:,}" if isinstance(fin['market_cap'], (int, float)) else fin['market_cap'])
@@ -459,31 +734,13 @@ if ticker:
             else:
                 st.warning("Financial data not available for this ticker.")
 
-        with tab5:
+    if active_view == TAB_TITLES[4]:
+        if stock_view_ready():
             st.subheader("🔗 Related Stock Information")
             try:
-                news = engine.get_news()
+                _, news = get_stock_details(ticker, engine)
                 if news:
-                    for item in news:
-                        # Handle new yfinance news structure
-                        content = item.get('content', {})
-                        title = content.get('title', item.get('title', 'Market Update'))
-                        link = content.get('canonicalUrl', {}).get('url', item.get('link', '#'))
-                        publisher = content.get('provider', {}).get('displayName', item.get('publisher', 'Financial News'))
-                        
-                        # Handle timestamps if available
-                        pub_time = content.get('pubDate', item.get('pubDate'))
-                        date_str = ""
-                        if pub_time:
-                            try:
-                                # yfinance often uses ISO format strings now, or timestamps
-                                if isinstance(pub_time, (int, float)):
-                                    date_str = datetime.fromtimestamp(pub_time).strftime('%Y-%m-%d %H:%M')
-                                else:
-                                    date_str = str(pub_time)[:16] # Use string slice for common ISO formats
-                            except:
-                                date_str = str(pub_time)
-
+                    for title, link, publisher, date_str in news:
                         with st.container():
                             st.markdown(f"#### [{title}]({link})")
                             st.write(f"📅 **Published:** {date_str} | **Source:** {publisher}")
@@ -493,539 +750,528 @@ if ticker:
             except Exception as e:
                 st.warning(f"Related information unavailable: {e}")
 
-        with tab6:
-            st.subheader("🚀 High-Confidence Market Opportunities")
-            st.info("The agent is currently screening the Top NSE stocks for immediate opportunities based on technical alignment.")
-            
+    if active_view == TAB_TITLES[5]:
+        st.subheader("🚀 High-Confidence Market Opportunities")
+        st.info("The agent is currently screening the Top NSE stocks for immediate opportunities based on technical alignment.")
+        
+        # Fragment: the scan/synthesis forms rerun only this block, not the
+        # per-stock tabs (engine load, chart, financials) above it
+        @st.fragment
+        def multi_stock_scanner():
             # List of some liquid NSE tickers for screening
-            top_nse_tickers = list(nse_stocks_dict.values())[:50]  # Use first 50 from NSE list
-            
-            if st.button("🔍 Run Multi-Stock Scanner"):
-                opps = {"buys": [], "sells": []}
-                progress_container = st.empty()
-                progress_bar = st.progress(0)
-                status_text = st.empty()
+            top_nse_tickers = TOP_NSE_TICKERS
+        
+            # Forms gate the rerun to the submit click; results live in session_state so
+            # the synthesis form below can rerun without discarding the scan
+            with st.form("multi_stock_scan_form", border=False):
+                scan_submitted = st.form_submit_button("🔍 Run Multi-Stock Scanner")
+        
+            if scan_submitted:
+                # Column-wise accumulators; sorted once with a numpy argsort after the scan
+                opps = {side: {"ticker": [], "price": [], "confidence": [], "reasoning": []} for side in ("buys", "sells")}
+                # One collapsible status box: only its label and bar change during the scan
+                with st.status(f"Downloading data for {len(top_nse_tickers)} stocks...", expanded=False) as scan_status:
+                    progress_bar = st.progress(0)
+                
+                    # ✅ One batched OHLCV download for the whole list (4h is built from 1h),
+                    # then analyze in parallel; tickers missing from the batch fetch themselves.
+                    # The batch is shared for 10 minutes, so a rescan skips the download
+                    scan_fetch_interval = '1h' if timeframe == '4h' else timeframe
+                    try:
+                        scan_data = cached_batch_download(top_nse_tickers, period='60d', interval=scan_fetch_interval)
+                    except Exception:
+                        scan_data = {}
+                
+                    def scan_one(scan_ticker):
+                        scan_df = scan_data.get(scan_ticker)
+                        if scan_df is not None and timeframe == '4h':
+                            scan_df = AnalysisEngine.resample_4h(scan_df)
+                        # Use a smaller period for scanning to speed up
+                        scan_engine = AnalysisEngine(f"{scan_ticker}.NS", interval=timeframe, period='60d', data=scan_df)
+                        return scan_ticker, scan_engine.analyze()
                 
-                with st.container():
-                    for i, ticker in enumerate(top_nse_tickers):
-                        status_text.text(f"Scanning {ticker} ({i+1}/{len(top_nse_tickers)})...")
-                        progress_bar.progress((i + 1) / len(top_nse_tickers))
+                    with ThreadPoolExecutor(max_workers=min(max_workers, len(top_nse_tickers))) as executor:
+                        futures = [executor.submit(scan_one, t) for t in top_nse_tickers]
+                        # Each progress/status call is a websocket message; send ~20 per scan
+                        progress_step = max(1, len(futures) // 20)
+                        for done, future in enumerate(as_completed(futures), 1):
+                            report = done % progress_step == 0 or done == len(futures)
+                            if report:
+                                progress_bar.progress(done / len(futures))
+                        
+                            try:
+                                scan_ticker, scan_res = future.result()
+                            except Exception:
+                                continue
+                            if report:
+                                scan_status.update(label=f"Scanned {scan_ticker} ({done}/{len(futures)})...")
                         
-                        try:
-                            full_ticker = f"{ticker}.NS"
-                            # Use a smaller period for scanning to speed up
-                            scan_engine = AnalysisEngine(full_ticker, interval=timeframe, period='60d')
-                            scan_res = scan_engine.analyze()
-                            
                             if scan_res and scan_res['confidence'] >= 70:
-                                stock_data = {
-                                    "ticker": ticker,
-                                    "price": scan_res['price'],
-                                    "confidence": scan_res['confidence'],
-                                    "bias": scan_res['bias'],
-                                    "reasoning": scan_res['reasoning']
-                                }
-                                if scan_res['bias'] == "Bullish":
-                                    opps["buys"].append(stock_data)
-                                elif scan_res['bias'] == "Bearish":
-                                    opps["sells"].append(stock_data)
-                        except Exception as e:
-                            continue
-                
-                status_text.success(f"Scan Complete! Found {len(opps['buys'])} Buy and {len(opps['sells'])} Sell opportunities.")
+                                side = SCAN_SIDE.get(scan_res['bias'])
+                                if side:
+                                    cols = opps[side]
+                                    cols["ticker"].append(scan_ticker)
+                                    cols["price"].append(scan_res['price'])
+                                    cols["confidence"].append(scan_res['confidence'])
+                                    cols["reasoning"].append(scan_res['reasoning'])
                 
-                # Sort by confidence
-                opps["buys"] = sorted(opps["buys"], key=lambda x: x['confidence'], reverse=True)
-                opps["sells"] = sorted(opps["sells"], key=lambda x: x['confidence'], reverse=True)
+                    # Keep the top MULTI_SCAN_TOP_K per side by confidence: argpartition
+                    # selects them in O(n), then only those k are ordered (ties by scan order)
+                    found = {side: len(cols["ticker"]) for side, cols in opps.items()}
+                    for side, cols in opps.items():
+                        conf = np.asarray(cols["confidence"], dtype=float)
+                        top = np.arange(len(conf))
+                        if len(conf) > MULTI_SCAN_TOP_K:
+                            top = np.argpartition(-conf, MULTI_SCAN_TOP_K - 1)[:MULTI_SCAN_TOP_K]
+                        order = top[np.lexsort((top, -conf[top]))]
+                        opps[side] = {k: [v[i] for i in order] for k, v in cols.items()}
                 
+                    scan_status.update(
+                        label=f"Scan Complete! Found {found['buys']} Buy and {found['sells']} Sell opportunities.",
+                        state="complete",
+                    )
+                st.session_state['scan_opps'] = (timeframe, opps)
+        
+            scan_state = st.session_state.get('scan_opps')
+            if scan_state and scan_state[0] == timeframe:
+                opps = scan_state[1]
+            
                 # AI Global Summary
-                if use_ai and (opps['buys'] or opps['sells']):
+                if use_ai and (opps['buys']['ticker'] or opps['sells']['ticker']):
                     st.markdown("---")
-                    if st.button("🤖 Ask AI for Global Synthesis"):
+                    with st.form("global_synthesis_form", border=False):
+                        synth_submitted = st.form_submit_button("🤖 Ask AI for Global Synthesis")
+                    if synth_submitted:
                         st.subheader("🤖 Agent Global Market View")
                         with st.spinner("AI is synthesizing scanner results..."):
                             summary_data = {
-                                "top_buys": [b['ticker'] for b in opps['buys'][:3]],
-                                "top_sells": [s['ticker'] for s in opps['sells'][:3]],
+                                "top_buys": opps['buys']['ticker'][:3],
+                                "top_sells": opps['sells']['ticker'][:3],
                                 "market_context": f"Scanned {len(top_nse_tickers)} stocks at {timeframe} interval."
                             }
                             global_insight = AnalysisEngine.get_ai_insight(summary_data, MODEL_URL, MODEL_KEY, selected_model)
                             st.info(global_insight)
                     st.markdown("---")
-                
+            
                 col_buy, col_sell = st.columns(2)
-                
+            
                 with col_buy:
                     st.success("### ✅ Top Buy Candidates")
-                    if not opps['buys']:
+                    buys = opps['buys']
+                    if not buys['ticker']:
                         st.write("No high-confidence buy setups found.")
-                    for buy in opps['buys']:
-                        with st.expander(f"🟢 {buy['ticker']} - ₹{buy['price']:.2f} (Conf: {buy['confidence']}%)"):
-                            st.markdown(f"[**Open TradingView Chart 📈**](https://www.tradingview.com/chart/?symbol=NSE:{buy['ticker']})")
+                    for t, price, conf, reasons in zip(buys['ticker'], buys['price'], buys['confidence'], buys['reasoning']):
+                        with st.expander(f"🟢 {t} - ₹{price:.2f} (Conf: {conf}%)"):
+                            st.markdown(f"[**Open TradingView Chart 📈**]({TRADINGVIEW_CHART_URL}{t})")
                             st.write("**Technical Basis:**")
-                            for r in buy['reasoning']:
+                            for r in reasons:
                                 st.write(f"- {r}")
-                            
+                        
                 with col_sell:
                     st.error("### ❌ Top Avoid/Sell Candidates")
-                    if not opps['sells']:
+                    sells = opps['sells']
+                    if not sells['ticker']:
                         st.write("No high-confidence sell setups found.")
-                    for sell in opps['sells']:
-                        with st.expander(f"🔴 {sell['ticker']} - ₹{sell['price']:.2f} (Conf: {sell['confidence']}%)"):
-                            st.markdown(f"[**Open TradingView Chart 📈**](https://www.tradingview.com/chart/?symbol=NSE:{sell['ticker']})")
+                    for t, price, conf, reasons in zip(sells['ticker'], sells['price'], sells['confidence'], sells['reasoning']):
+                        with st.expander(f"🔴 {t} - ₹{price:.2f} (Conf: {conf}%)"):
+                            st.markdown(f"[**Open TradingView Chart 📈**]({TRADINGVIEW_CHART_URL}{t})")
                             st.write("**Technical Basis:**")
-                            for r in sell['reasoning']:
+                            for r in reasons:
                                 st.write(f"- {r}")
             else:
                 st.write("Click 'Run Multi-Stock Scanner' to find current opportunities in the market.")
 
-        with tab7:
-            st.subheader("💹 Smart Money Concept & Institutional Tracker")
-            st.info("Detecting institutional accumulation and large volume absorption across the market.")
-            
-            # 1. Load and Display Cached Results (Immediate)
-            db = get_db_manager()
-            cached_results, last_updated = db.get_results("smc")
+        multi_stock_scanner()
+
+    if active_view == TAB_TITLES[6]:
+        st.subheader("💹 Smart Money Concept & Institutional Tracker")
+        st.info("Detecting institutional accumulation and large volume absorption across the market.")
+        
+        # 1. Load and Display Cached Results (Immediate)
+        db = get_db()
+        display_df, last_updated = stored_results_table("smc")
+        
+        if display_df is not None:
+            st.success(f"✅ Loaded {len(display_df)} stocks from Database (Last Updated: {last_updated.strftime('%H:%M %d %b')})")
+            st.dataframe(display_df, 
+                         column_config=SCORED_LINK_COLUMN_CONFIG,
+                         use_container_width=True)
+        else:
+            st.info("💡 Data is being prepared. Check back soon or run a manual scan.")
+
+        # 2. Manual Scan Option
+        force_refresh = st.button("♻️ Force Refresh", key="smc_force_refresh", help="Ignore results cached in the last 15 minutes and rescan")
+        if st.button("🛰️ Run Smart Money Scanner") or force_refresh:
+            if force_refresh:
+                AnalysisEngine.get_smart_money_stocks.clear_cache()
+                cached_batch_download.clear_cache()
+            progress_bar = st.progress(0)
+            status_text = st.empty()
+            start_time = time.time()
             
-            if cached_results:
-                st.success(f"✅ Loaded {len(cached_results)} stocks from Database (Last Updated: {last_updated.strftime('%H:%M %d %b')})")
-                # Normalize stored results to match live scan structure
+            with st.spinner("Monitoring institutional footprints across NSE..."):
                 try:
-                    norm = normalize_scanner_results('smc', cached_results) if normalize_scanner_results else cached_results
-                except Exception:
-                    norm = cached_results
-
-                display_df = pd.DataFrame(add_tradingview_column(norm))
-                st.dataframe(display_df, 
-                             column_config={
-                                 "Stock Symbol": st.column_config.LinkColumn("Stock Symbol", display_text="symbol=NSE:(.*)"),
-                                 "Score": None,
-                                 "pct_change": None
-                             },
-                             use_container_width=True)
-            else:
-                st.info("💡 Data is being prepared. Check back soon or run a manual scan.")
+                    all_tickers = ALL_TICKERS[:scan_depth]
+                    
+                    update_progress = make_progress_callback(progress_bar, status_text, start_time)
+                    
+                    sm_stocks = AnalysisEngine.get_smart_money_stocks(
+                        all_tickers,
+                        max_results=20,
+                        max_workers=max_workers,
+                        progress_callback=update_progress
+                    )
+                    
+                    elapsed = time.time() - start_time
+                    if sm_stocks:
+                        status_text.success(f"✅ Found {len(sm_stocks)} stocks with institutional footprints in {elapsed:.1f}s")
+                        # Normalize live results to same structure as stored
+                        try:
+                            norm_live = normalize_scanner_results('smc', sm_stocks) if normalize_scanner_results else sm_stocks
+                        except Exception:
+                            norm_live = sm_stocks
 
-            # 2. Manual Scan Option
-            if st.button("🛰️ Run Smart Money Scanner"):
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                start_time = time.time()
-                
-                with st.spinner("Monitoring institutional footprints across NSE..."):
-                    try:
-                        all_tickers = list(nse_stocks_dict.values())[:scan_depth]
-                        
-                        # Progress callback
-                        def update_progress(current, total, ticker):
-                            progress = current / total
-                            progress_bar.progress(progress)
-                            elapsed = time.time() - start_time
-                            rate = current / elapsed if elapsed > 0 else 0
-                            eta = (total - current) / rate if rate > 0 else 0
-                            status_text.text(f"Scanned {current}/{total} stocks ({rate:.1f} stocks/sec) - ETA: {eta:.0f}s - Last: {ticker}")
-                        
-                        sm_stocks = AnalysisEngine.get_smart_money_stocks(
-                            all_tickers,
-                            max_results=20,
-                            max_workers=max_workers,
-                            progress_callback=update_progress
-                        )
-                        
-                        elapsed = time.time() - start_time
-                        if sm_stocks:
-                            status_text.success(f"✅ Found {len(sm_stocks)} stocks with institutional footprints in {elapsed:.1f}s")
-                            # Normalize live results to same structure as stored
-                            try:
-                                norm_live = normalize_scanner_results('smc', sm_stocks) if normalize_scanner_results else sm_stocks
-                            except Exception:
-                                norm_live = sm_stocks
-
-                            norm_live = add_tradingview_column(norm_live)
-                            sm_df = pd.DataFrame(norm_live)
-                            st.dataframe(sm_df, 
-                                         column_config={
-                                             "Stock Symbol": st.column_config.LinkColumn("Stock Symbol", display_text="symbol=NSE:(.*)"),
-                                             "Score": None,
-                                             "pct_change": None
-                                         },
-                                         use_container_width=True)
-                            # Save to DB if scanned manually
-                            db.save_results("smc", sm_stocks)
-                        else:
-                            status_text.warning("No significant institutional activity detected.")
-                    except Exception as e:
-                        st.error(f"Scanner error: {str(e)}")
+                        sm_df = add_tradingview_column(norm_live)
+                        st.dataframe(sm_df, 
+                                     column_config=SCORED_LINK_COLUMN_CONFIG,
+                                     use_container_width=True)
+                        # Save to DB if scanned manually
+                        db.save_results("smc", sm_stocks)
+                        clear_stored_results()
+                    else:
+                        status_text.warning("No significant institutional activity detected.")
+                except Exception as e:
+                    st.error(f"Scanner error: {str(e)}")
 
-        with tab8:
-            st.subheader("🎯 Swing Trading Scanner (15–20 Days)")
-            st.info("Scanning for stocks with EMA alignment, RSI momentum, and Volume surge.")
-            
-            # 1. Load and Display Cached Results (Immediate)
-            db = get_db_manager()
-            cached_results, last_updated = db.get_results("swing")
+    if active_view == TAB_TITLES[7]:
+        st.subheader("🎯 Swing Trading Scanner (15–20 Days)")
+        st.info("Scanning for stocks with EMA alignment, RSI momentum, and Volume surge.")
+        
+        # 1. Load and Display Cached Results (Immediate)
+        db = get_db()
+        display_df, last_updated = stored_results_table("swing")
+        
+        if display_df is not None:
+            st.success(f"✅ Loaded {len(display_df)} setups from Database (Last Updated: {last_updated.strftime('%H:%M %d %b')})")
+            st.dataframe(display_df, 
+                         column_config=SCORED_LINK_COLUMN_CONFIG,
+                         use_container_width=True)
+        else:
+            st.info("💡 Data is being prepared. Check back soon or run a manual scan.")
+
+        # 2. Manual Scan Option
+        force_refresh = st.button("♻️ Force Refresh", key="swing_force_refresh", help="Ignore results cached in the last 15 minutes and rescan")
+        if st.button("🔍 Run Swing Scanner") or force_refresh:
+            if force_refresh:
+                AnalysisEngine.get_swing_stocks.clear_cache()
+                cached_batch_download.clear_cache()
+            progress_bar = st.progress(0)
+            status_text = st.empty()
+            start_time = time.time()
             
-            if cached_results:
-                st.success(f"✅ Loaded {len(cached_results)} setups from Database (Last Updated: {last_updated.strftime('%H:%M %d %b')})")
+            with st.spinner("Analyzing NSE market trends for high-quality Swing setups..."):
                 try:
-                    norm = normalize_scanner_results('swing', cached_results) if normalize_scanner_results else cached_results
-                except Exception:
-                    norm = cached_results
-
-                display_df = pd.DataFrame(add_tradingview_column(norm))
-                st.dataframe(display_df, 
-                             column_config={
-                                 "Stock Symbol": st.column_config.LinkColumn("Stock Symbol", display_text="symbol=NSE:(.*)"),
-                                 "pct_change": None,
-                                 "Score": None
-                             },
-                             use_container_width=True)
-            else:
-                st.info("💡 Data is being prepared. Check back soon or run a manual scan.")
+                    all_tickers = ALL_TICKERS[:scan_depth]
 
-            # 2. Manual Scan Option
-            if st.button("🔍 Run Swing Scanner"):
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                start_time = time.time()
-                
-                with st.spinner("Analyzing NSE market trends for high-quality Swing setups..."):
-                    try:
-                        all_tickers = list(nse_stocks_dict.values())[:scan_depth]
-
-                        # Progress callback
-                        def update_progress(current, total, ticker):
-                            progress = current / total
-                            progress_bar.progress(progress)
-                            elapsed = time.time() - start_time
-                            rate = current / elapsed if elapsed > 0 else 0
-                            eta = (total - current) / rate if rate > 0 else 0
-                            status_text.text(f"Scanned {current}/{total} stocks ({rate:.1f} stocks/sec) - ETA: {eta:.0f}s - Last: {ticker}")
-                        
-                        swing_stocks = AnalysisEngine.get_swing_stocks(
-                            all_tickers,
-                            interval=timeframe,
-                            period=periods[timeframe],
-                            max_results=20,
-                            max_workers=max_workers,
-                            progress_callback=update_progress,
-                            min_market_cap=min_market_cap_value
-                        )
-                        
-                        elapsed = time.time() - start_time
-                        status_text.success(f"✅ Scan complete in {elapsed:.1f}s! Found {len(swing_stocks)} high-quality swing candidates.")
+                    update_progress = make_progress_callback(progress_bar, status_text, start_time)
+                    
+                    swing_stocks = AnalysisEngine.get_swing_stocks(
+                        all_tickers,
+                        interval=timeframe,
+                        period=PERIODS[timeframe],
+                        max_results=20,
+                        max_workers=max_workers,
+                        progress_callback=update_progress,
+                        min_market_cap=min_market_cap_value
+                    )
+                    
+                    elapsed = time.time() - start_time
+                    status_text.success(f"✅ Scan complete in {elapsed:.1f}s! Found {len(swing_stocks)} high-quality swing candidates.")
 
-                        if swing_stocks:
-                            try:
-                                norm_live = normalize_scanner_results('swing', swing_stocks) if normalize_scanner_results else swing_stocks
-                            except Exception:
-                                norm_live = swing_stocks
-
-                            norm_live = add_tradingview_column(norm_live)
-                            st.dataframe(pd.DataFrame(norm_live), 
-                                         column_config={
-                                             "Stock Symbol": st.column_config.LinkColumn("Stock Symbol", display_text="symbol=NSE:(.*)"),
-                                             "pct_change": None,
-                                             "Score": None
-                                         },
-                                         use_container_width=True)
-                            # Save to DB if scanned manually
-                            db.save_results("swing", swing_stocks)
-                        else:
-                            st.warning("No high-quality bullish swing setups found at the moment.")
-                    except Exception as e:
-                        st.error(f"Scanner error: {str(e)}")
+                    if swing_stocks:
+                        try:
+                            norm_live = normalize_scanner_results('swing', swing_stocks) if normalize_scanner_results else swing_stocks
+                        except Exception:
+                            norm_live = swing_stocks
 
-        with tab9:
-            st.subheader("⏳ Long Term Investing")
-            st.info("Filtering for stocks with high growth, ROE, and low debt (Fundamental Strength).")
-            
-            # 1. Load and Display Cached Results (Immediate)
-            db = get_db_manager()
-            cached_results, last_updated = db.get_results("long_term")
-            
-            if cached_results:
-                st.success(f"✅ Loaded {len(cached_results)} companies from Database (Last Updated: {last_updated.strftime('%H:%M %d %b')})")
-                norm = normalize_scanner_results('long_term', cached_results) if normalize_scanner_results else cached_results
-                display_df = pd.DataFrame(add_tradingview_column(norm))
-                st.dataframe(display_df, 
-                             column_config={
-                                 "Stock Symbol": st.column_config.LinkColumn("Stock Symbol", display_text="symbol=NSE:(.*)")
-                             },
-                             use_container_width=True)
-            else:
-                st.info("💡 Data is being prepared. Check back soon or run a manual scan.")
+                        norm_live = add_tradingview_column(norm_live)
+                        st.dataframe(norm_live, 
+                                     column_config=SCORED_LINK_COLUMN_CONFIG,
+                                     use_container_width=True)
+                        # Save to DB if scanned manually
+                        db.save_results("swing", swing_stocks)
+                        clear_stored_results()
+                    else:
+                        st.warning("No high-quality bullish swing setups found at the moment.")
+                except Exception as e:
+                    st.error(f"Scanner error: {str(e)}")
 
-            # 2. Manual Scan Option
-            if st.button("📈 Run Long-Term Scanner", key="long_term_scanner"):
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                start_time = time.time()
-                
-                with st.spinner("Evaluating NSE company fundamentals (this may take a moment)..."):
-                    try:
-                        all_tickers = list(nse_stocks_dict.values())[:scan_depth]
-                        
-                        # Progress callback
-                        def update_progress(current, total, ticker):
-                            progress = current / total
-                            progress_bar.progress(progress)
-                            elapsed = time.time() - start_time
-                            rate = current / elapsed if elapsed > 0 else 0
-                            eta = (total - current) / rate if rate > 0 else 0
-                            status_text.text(f"Scanned {current}/{total} stocks ({rate:.1f} stocks/sec) - ETA: {eta:.0f}s - Last: {ticker}")
-                        
-                        lt_stocks = AnalysisEngine.get_long_term_stocks(
-                            all_tickers,
-                            max_results=20,
-                            max_workers=max_workers,
-                            progress_callback=update_progress
-                        )
-                        
-                        elapsed = time.time() - start_time
-                        if lt_stocks:
-                            status_text.success(f"✅ Found {len(lt_stocks)} fundamentally strong companies in {elapsed:.1f}s")
+    if active_view == TAB_TITLES[8]:
+        st.subheader("⏳ Long Term Investing")
+        st.info("Filtering for stocks with high growth, ROE, and low debt (Fundamental Strength).")
+        
+        # 1. Load and Display Cached Results (Immediate)
+        db = get_db()
+        display_df, last_updated = stored_results_table("long_term")
+        
+        if display_df is not None:
+            st.success(f"✅ Loaded {len(display_df)} companies from Database (Last Updated: {last_updated.strftime('%H:%M %d %b')})")
+            st.dataframe(display_df, 
+                         column_config=LINK_COLUMN_CONFIG,
+                         use_container_width=True)
+        else:
+            st.info("💡 Data is being prepared. Check back soon or run a manual scan.")
+
+        # 2. Manual Scan Option
+        force_refresh = st.button("♻️ Force Refresh", key="long_term_force_refresh", help="Ignore results cached in the last 15 minutes and rescan")
+        if st.button("📈 Run Long-Term Scanner", key="long_term_scanner") or force_refresh:
+            if force_refresh:
+                AnalysisEngine.get_long_term_stocks.clear_cache()
+                cached_batch_download.clear_cache()
+            progress_bar = st.progress(0)
+            status_text = st.empty()
+            start_time = time.time()
+            
+            with st.spinner("Evaluating NSE company fundamentals (this may take a moment)..."):
+                try:
+                    all_tickers = ALL_TICKERS[:scan_depth]
+                    
+                    update_progress = make_progress_callback(progress_bar, status_text, start_time)
+                    
+                    lt_stocks = AnalysisEngine.get_long_term_stocks(
+                        all_tickers,
+                        max_results=20,
+                        max_workers=max_workers,
+                        progress_callback=update_progress
+                    )
+                    
+                    elapsed = time.time() - start_time
+                    if lt_stocks:
+                        status_text.success(f"✅ Found {len(lt_stocks)} fundamentally strong companies in {elapsed:.1f}s")
+                        norm_lt = normalize_scanner_results('long_term', lt_stocks) if normalize_scanner_results else lt_stocks
+                        st.dataframe(add_tradingview_column(norm_lt), 
+                                     column_config=LINK_COLUMN_CONFIG,
+                                     use_container_width=True)
+                        # Save to DB if scanned manually
+                        db.save_results("long_term", norm_lt)
+                        clear_stored_results()
+                    else:
+                        # If we received cached candidates, show a clearer message
+                        from scanner_robustness import ScannerConfig
+                        if lt_stocks and any(isinstance(r, dict) and r.get('_from_cache') for r in lt_stocks):
+                            status_text.info("No live fundamentals available; showing cached fundamental candidates.")
                             norm_lt = normalize_scanner_results('long_term', lt_stocks) if normalize_scanner_results else lt_stocks
-                            lt_stocks = add_tradingview_column(norm_lt)
-                            st.dataframe(pd.DataFrame(lt_stocks), 
-                                         column_config={
-                                             "Stock Symbol": st.column_config.LinkColumn("Stock Symbol", display_text="symbol=NSE:(.*)")
-                                         },
+                            st.dataframe(add_tradingview_column(norm_lt), 
+                                         column_config=LINK_COLUMN_CONFIG,
                                          use_container_width=True)
-                            # Save to DB if scanned manually
-                            db.save_results("long_term", lt_stocks)
+                            db.save_results("long_term", norm_lt)
+                            clear_stored_results()
                         else:
-                            # If we received cached candidates, show a clearer message
-                            from scanner_robustness import ScannerConfig
-                            if lt_stocks and any(isinstance(r, dict) and r.get('_from_cache') for r in lt_stocks):
-                                status_text.info("No live fundamentals available; showing cached fundamental candidates.")
-                                norm_lt = normalize_scanner_results('long_term', lt_stocks) if normalize_scanner_results else lt_stocks
-                                lt_stocks = add_tradingview_column(norm_lt)
-                                st.dataframe(pd.DataFrame(lt_stocks), 
-                                             column_config={
-                                                 "Stock Symbol": st.column_config.LinkColumn("Stock Symbol", display_text="symbol=NSE:(.*)")
-                                             },
-                                             use_container_width=True)
-                                db.save_results("long_term", lt_stocks)
-                            else:
-                                status_text.warning("No stocks met the strict fundamental criteria.")
-                    except Exception as e:
-                        st.error(f"Scanner error: {str(e)}")
-
-        with tab10:
-            st.subheader("🗓️ Cyclical Stocks by Quarter")
-            st.info("Stocks categorized by their historically best-performing quarter (10yr backtest).")
-            
-            # 1. Load and Display Cached Results (Immediate)
-            db = get_db_manager()
-            cached_results, last_updated = db.get_results("cyclical")
-            
-            if cached_results:
-                st.success(f"✅ Loaded seasonal patterns from Database (Last Updated: {last_updated.strftime('%H:%M %d %b')})")
-                cyclical_groups = cached_results
-            else:
-                st.info("💡 Seasonal data is being prepared. Run manual scan for instant calculation.")
-                cyclical_groups = None
-
-            # 2. Manual Scan Option
-            if st.button("🗓️ Run Cyclical Scanner"):
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                start_time = time.time()
-                
-                with st.spinner("Calculating 10-year seasonal return probabilities for NSE stocks..."):
-                    try:
-                        st.info("Scanning for seasonal patterns (this may take a minute)...")
-                        all_tickers = list(nse_stocks_dict.values())[:scan_depth]
-                        
-                        # Progress callback
-                        def update_progress(current, total, ticker):
-                            progress = current / total
-                            progress_bar.progress(progress)
-                            elapsed = time.time() - start_time
-                            rate = current / elapsed if elapsed > 0 else 0
-                            eta = (total - current) / rate if rate > 0 else 0
-                            status_text.text(f"Scanned {current}/{total} stocks ({rate:.1f} stocks/sec) - ETA: {eta:.0f}s - Last: {ticker}")
-                        
-                        cyclical_groups = AnalysisEngine.get_cyclical_stocks_by_quarter(
-                            all_tickers,
-                            max_results_per_quarter=15,
-                            max_workers=8,  # Lower workers for data-heavy operation
-                            progress_callback=update_progress
-                        )
-                        # Save to DB if scanned manually
-                        db.save_results("cyclical", cyclical_groups)
-                        
-                        elapsed = time.time() - start_time
-                        total_found = sum(len(v) for v in cyclical_groups.values())
-                        status_text.success(f"✅ Analyzed seasonal patterns in {elapsed:.1f}s. Found {total_found} historical outperformers.")
-                        
-                        sub_q1, sub_q2, sub_q3, sub_q4 = st.tabs(["Q1 Stocks", "Q2 Stocks", "Q3 Stocks", "Q4 Stocks"])
-                        
-                        with sub_q1:
-                            if cyclical_groups["Q1"]:
-                                norm_q1 = normalize_scanner_results('cyclical', cyclical_groups["Q1"]) if normalize_scanner_results else cyclical_groups["Q1"]
-                                q1 = add_tradingview_column(norm_q1)
-                                st.dataframe(pd.DataFrame(q1), 
-                                             column_config={"Stock Symbol": st.column_config.LinkColumn("Stock Symbol", display_text="NSE:(.*)")},
-                                             use_container_width=True)
-                            else: st.info("No significant Q1 outperformers found in this sample.")
-                        with sub_q2:
-                            if cyclical_groups["Q2"]:
-                                norm_q2 = normalize_scanner_results('cyclical', cyclical_groups["Q2"]) if normalize_scanner_results else cyclical_groups["Q2"]
-                                q2 = add_tradingview_column(norm_q2)
-                                st.dataframe(pd.DataFrame(q2), 
-                                             column_config={"Stock Symbol": st.column_config.LinkColumn("Stock Symbol", display_text="NSE:(.*)")},
-                                             use_container_width=True)
-                            else: st.info("No significant Q2 outperformers found in this sample.")
-                        with sub_q3:
-                            if cyclical_groups["Q3"]:
-                                norm_q3 = normalize_scanner_results('cyclical', cyclical_groups["Q3"]) if normalize_scanner_results else cyclical_groups["Q3"]
-                                q3 = add_tradingview_column(norm_q3)
-                                st.dataframe(pd.DataFrame(q3), 
-                                             column_config={"Stock Symbol": st.column_config.LinkColumn("Stock Symbol", display_text="NSE:(.*)")},
-                                             use_container_width=True)
-                            else: st.info("No significant Q3 outperformers found in this sample.")
-                        with sub_q4:
-                            if cyclical_groups["Q4"]:
-                                norm_q4 = normalize_scanner_results('cyclical', cyclical_groups["Q4"]) if normalize_scanner_results else cyclical_groups["Q4"]
-                                q4 = add_tradingview_column(norm_q4)
-                                st.dataframe(pd.DataFrame(q4), 
-                                             column_config={"Stock Symbol": st.column_config.LinkColumn("Stock Symbol", display_text="NSE:(.*)")},
-                                             use_container_width=True)
-                            else: st.info("No significant Q4 outperformers found in this sample.")
-                    except Exception as e:
-                        st.error(f"Scanner error: {str(e)}")
-
-        with tab11:
-            st.subheader("📌 Weinstein Stages & Minervini Checklist")
-            st.info("Institutional Stage Analysis following global standards.")
+                            status_text.warning("No stocks met the strict fundamental criteria.")
+                except Exception as e:
+                    st.error(f"Scanner error: {str(e)}")
+
+    if active_view == TAB_TITLES[9]:
+        st.subheader("🗓️ Cyclical Stocks by Quarter")
+        st.info("Stocks categorized by their historically best-performing quarter (10yr backtest).")
+        
+        # 1. Load and Display Cached Results (Immediate)
+        db = get_db()
+        cached_results, last_updated = stored_group_tables("cyclical")
+        
+        if cached_results:
+            st.success(f"✅ Loaded seasonal patterns from Database (Last Updated: {last_updated.strftime('%H:%M %d %b')})")
+            cyclical_groups = cached_results
+        else:
+            st.info("💡 Seasonal data is being prepared. Run manual scan for instant calculation.")
+            cyclical_groups = None
+
+        # 2. Manual Scan Option
+        force_refresh = st.button("♻️ Force Refresh", key="cyclical_force_refresh", help="Ignore results cached in the last 15 minutes and rescan")
+        if st.button("🗓️ Run Cyclical Scanner") or force_refresh:
+            if force_refresh:
+                AnalysisEngine.get_cyclical_stocks_by_quarter.clear_cache()
+                cached_batch_download.clear_cache()
+            progress_bar = st.progress(0)
+            status_text = st.empty()
+            start_time = time.time()
             
-            # 1. Individual Analysis
-            st.markdown("### 🔍 Individual Stock Audit")
-            stage_data = engine.get_stage_analysis()
-            if stage_data:
+            with st.spinner("Calculating 10-year seasonal return probabilities for NSE stocks..."):
+                try:
+                    st.info("Scanning for seasonal patterns (this may take a minute)...")
+                    all_tickers = ALL_TICKERS[:scan_depth]
+                    
+                    update_progress = make_progress_callback(progress_bar, status_text, start_time)
+                    
+                    cyclical_groups = AnalysisEngine.get_cyclical_stocks_by_quarter(
+                        all_tickers,
+                        max_results_per_quarter=15,
+                        max_workers=8,  # Lower workers for data-heavy operation
+                        progress_callback=update_progress
+                    )
+                    # Save to DB if scanned manually
+                    db.save_results("cyclical", cyclical_groups)
+                    clear_stored_results()
+                    cyclical_groups = group_tables("cyclical", cyclical_groups)
+                    
+                    elapsed = time.time() - start_time
+                    total_found = sum(len(v) for v in cyclical_groups.values() if v is not None)
+                    status_text.success(f"✅ Analyzed seasonal patterns in {elapsed:.1f}s. Found {total_found} historical outperformers.")
+                    
+                    sub_q1, sub_q2, sub_q3, sub_q4 = st.tabs(QUARTER_TAB_TITLES)
+                    
+                    with sub_q1:
+                        q1 = cyclical_groups.get("Q1")
+                        if q1 is not None:
+                            st.dataframe(q1, 
+                                         column_config=LINK_COLUMN_CONFIG,
+                                         use_container_width=True)
+                        else: st.info("No significant Q1 outperformers found in this sample.")
+                    with sub_q2:
+                        q2 = cyclical_groups.get("Q2")
+                        if q2 is not None:
+                            st.dataframe(q2, 
+                                         column_config=LINK_COLUMN_CONFIG,
+                                         use_container_width=True)
+                        else: st.info("No significant Q2 outperformers found in this sample.")
+                    with sub_q3:
+                        q3 = cyclical_groups.get("Q3")
+                        if q3 is not None:
+                            st.dataframe(q3, 
+                                         column_config=LINK_COLUMN_CONFIG,
+                                         use_container_width=True)
+                        else: st.info("No significant Q3 outperformers found in this sample.")
+                    with sub_q4:
+                        q4 = cyclical_groups.get("Q4")
+                        if q4 is not None:
+                            st.dataframe(q4, 
+                                         column_config=LINK_COLUMN_CONFIG,
+                                         use_container_width=True)
+                        else: st.info("No significant Q4 outperformers found in this sample.")
+                except Exception as e:
+                    st.error(f"Scanner error: {str(e)}")
+
+    if active_view == TAB_TITLES[10]:
+        st.subheader("📌 Weinstein Stages & Minervini Checklist")
+        st.info("Institutional Stage Analysis following global standards.")
+        
+        # 1. Individual Analysis
+        st.markdown("### 🔍 Individual Stock Audit")
+        if stock_view_ready():
+            audit = stage_audit(ticker, timeframe, df.index[-1], engine)
+            if audit:
+                minervini_table, weinstein, cpr_table = audit
                 col1, col2 = st.columns([1, 1])
                 with col1:
-                    st.markdown("""<div style="background-color: #1e2130; color: white; padding: 10px; border-radius: 5px; font-weight: bold; margin-bottom: 15px;">📋 Mark Minervini Template</div>""", unsafe_allow_html=True)
-                    for criteria, met in stage_data['minervini'].items():
-                        icon = "✅" if met else "❌"; color = "#10b981" if met else "#ef4444"
-                        st.markdown(f"<p style='margin:0; font-size:16px;'>{icon} <span style='color:{color}'>{criteria}</span></p>", unsafe_allow_html=True)
+                    st.markdown("#### 📋 Mark Minervini Template")
+                    # One native table instead of an HTML paragraph per criterion
+                    st.table(minervini_table)
                 with col2:
-                    st.markdown(f"""<div style="background-color: #1e2130; color: white; padding: 10px; border-radius: 5px; font-weight: bold; margin-bottom: 15px;">📌 Stan Weinstein Stage Analysis</div><div style="background-color: {stage_data['weinstein']['color']}; color: white; padding: 8px 15px; font-size: 18px; font-weight: bold; border-left: 5px solid white;">Current Stage: {stage_data['weinstein']['stage']}</div><div style="background-color: #d1d5db33; padding: 5px 15px; margin-bottom: 10px; font-size: 14px;"><b>Action:</b> {stage_data['weinstein']['action']}</div><div style="background-color: #d1d5db33; padding: 5px 15px; margin-bottom: 20px; font-size: 14px;"><b>Mansfield RS:</b> {stage_data['weinstein']['rs']}</div>""", unsafe_allow_html=True)
-                    st.markdown("""<table style="width:100%; border-collapse: collapse; border: 1px solid #374151; font-family: sans-serif;"><tr style="border: 1px solid #374151; background: #1e2130;"><td style="padding: 10px; font-weight: bold; color: white;">Metrics</td><td style="padding: 10px; font-weight: bold; color: white;">Value</td></tr><tr style="border: 1px solid #374151;"><td style="padding: 10px; font-weight: bold;">CPR Width</td><td style="padding: 10px;">"""+stage_data['cpr']['width']+"""</td></tr><tr style="border: 1px solid #374151;"><td style="padding: 10px; font-weight: bold;">CPR Type</td><td style="padding: 10px;">"""+stage_data['cpr']['type']+"""</td></tr><tr style="border: 1px solid #374151;"><td style="padding: 10px; font-weight: bold;">IB (Range)</td><td style="padding: 10px; color: #ef4444;">"""+str(stage_data['cpr']['range'])+"""</td></tr></table>""", unsafe_allow_html=True)
+                    st.markdown("#### 📌 Stan Weinstein Stage Analysis")
+                    st.markdown(f"<span style='background-color: {weinstein['color']}; color: white; padding: 6px 12px; border-radius: 4px; font-weight: bold;'>Current Stage: {weinstein['stage']}</span>", unsafe_allow_html=True)
+                    st.write(f"**Action:** {weinstein['action']} | **Mansfield RS:** {weinstein['rs']}")
+                    st.table(cpr_table)
             else:
                 st.warning("Insufficient data for Stage Analysis.")
 
-            st.markdown("---")
-            
-            # 2. Market-wide Scanner
-            st.markdown("### 🛰️ Weinstein Market-wide Scanner")
-            st.write("Scan the entire market to find stocks currently in specific stages.")
-            
-            # 1. Load and Display Cached Results (Immediate)
-            db = get_db_manager()
-            cached_results, last_updated = db.get_results("stage_analysis")
+        st.markdown("---")
+        
+        # 2. Market-wide Scanner
+        st.markdown("### 🛰️ Weinstein Market-wide Scanner")
+        st.write("Scan the entire market to find stocks currently in specific stages.")
+        
+        # 1. Load and Display Cached Results (Immediate)
+        db = get_db()
+        cached_results, last_updated = stored_group_tables("stage_analysis")
+        
+        
+        if cached_results:
+            st.success(f"✅ Loaded Market Stages from Database (Last Updated: {last_updated.strftime('%H:%M %d %b')})")
+            stage_results = cached_results
+        else:
+            st.info("💡 Market stage data is being prepared.")
+            stage_results = None
+
+        # 2. Manual Scan Option
+        if st.button("🚀 Run Stage Scanner"):
+            progress_bar = st.progress(0)
+            status_text = st.empty()
+            start_time = time.time()
             
+            with st.spinner("Classifying market into Weinstein Stages (1-4)..."):
+                try:
+                    st.info("Running market-wide stage classification...")
+                    all_tickers = ALL_TICKERS[:scan_depth]
+                    
+                    update_progress = make_progress_callback(progress_bar, status_text, start_time)
+                    
+                    stage_results = AnalysisEngine.get_weinstein_scanner_stocks(
+                        all_tickers,
+                        max_workers=max_workers,
+                        progress_callback=update_progress
+                    )
+                    db.save_results("stage_analysis", stage_results)
+                    clear_stored_results()
+                    
+                    elapsed = time.time() - start_time
+                    total_found = sum(len(v) for v in stage_results.values())
+                    stage_results = group_tables("stage_analysis", stage_results)
+                    status_text.success(f"✅ Stage classification complete in {elapsed:.1f}s. Found {total_found} stocks.")
+                except Exception as e:
+                    st.error(f"Scanner error: {str(e)}")
+                    stage_results = None
+        
+        # 3. Display Results (persists after button click)
+        if stage_results:
+            st.markdown("---")
+            s_tabs = st.tabs(STAGE_TAB_TITLES)
             
-            if cached_results:
-                st.success(f"✅ Loaded Market Stages from Database (Last Updated: {last_updated.strftime('%H:%M %d %b')})")
-                stage_results = cached_results
+            with s_tabs[0]:
+                s1 = stage_results.get("Stage 1 - Basing")
+                if s1 is not None:
+                    st.dataframe(s1, 
+                                 column_config=LINK_COLUMN_CONFIG,
+                                 use_container_width=True)
+                else: st.info("No stocks currently in the basing stage.")
+            with s_tabs[1]:
+                s2 = stage_results.get("Stage 2 - Advancing")
+                if s2 is not None:
+                    st.dataframe(s2, 
+                                 column_config=LINK_COLUMN_CONFIG,
+                                 use_container_width=True)
+                else: st.info("No stocks currently in the advancing stage.")
+            with s_tabs[2]:
+                s3 = stage_results.get("Stage 3 - Top")
+                if s3 is not None:
+                    st.dataframe(s3, 
+                                 column_config=LINK_COLUMN_CONFIG,
+                                 use_container_width=True)
+                else: st.info("No stocks currently in the top/distribution stage.")
+            with s_tabs[3]:
+                s4 = stage_results.get("Stage 4 - Declining")
+                if s4 is not None:
+                    st.dataframe(s4, 
+                                 column_config=LINK_COLUMN_CONFIG,
+                                 use_container_width=True)
+                else: st.info("No stocks currently in the declining stage.")
+    
+    # ===== Tab 12: 15-Day History =====
+    if active_view == TAB_TITLES[11]:
+        st.subheader("📊 15-Day Scanner History & Analysis")
+        if show_all_scanners_history is not None:
+            history_view = st.radio("View Mode:", ["Individual Scanner", "Compare All"], horizontal=True)
+            if history_view == "Individual Scanner":
+                show_all_scanners_history()
             else:
-                st.info("💡 Market stage data is being prepared.")
-                stage_results = None
-
-            # 2. Manual Scan Option
-            if st.button("🚀 Run Stage Scanner"):
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                start_time = time.time()
-                
-                with st.spinner("Classifying market into Weinstein Stages (1-4)..."):
-                    try:
-                        st.info("Running market-wide stage classification...")
-                        all_tickers = list(nse_stocks_dict.values())[:scan_depth]
-                        
-                        # Progress callback
-                        def update_progress(current, total, ticker):
-                            progress = current / total
-                            progress_bar.progress(progress)
-                            elapsed = time.time() - start_time
-                            rate = current / elapsed if elapsed > 0 else 0
-                            eta = (total - current) / rate if rate > 0 else 0
-                            status_text.text(f"Scanned {current}/{total} stocks ({rate:.1f} stocks/sec) - ETA: {eta:.0f}s - Last: {ticker}")
-                        
-                        stage_results = AnalysisEngine.get_weinstein_scanner_stocks(
-                            all_tickers,
-                            max_workers=max_workers,
-                            progress_callback=update_progress
-                        )
-                        db.save_results("stage_analysis", stage_results)
-                        
-                        elapsed = time.time() - start_time
-                        total_found = sum(len(v) for v in stage_results.values())
-                        status_text.success(f"✅ Stage classification complete in {elapsed:.1f}s. Found {total_found} stocks.")
-                    except Exception as e:
-                        st.error(f"Scanner error: {str(e)}")
-                        stage_results = None
-            
-            # 3. Display Results (persists after button click)
-            if stage_results:
-                st.markdown("---")
-                s_tabs = st.tabs(["🏗️ Stage 1", "🚀 Stage 2", "📉 Stage 3", "💀 Stage 4"])
-                
-                with s_tabs[0]:
-                    if stage_results.get("Stage 1 - Basing"):
-                        norm_s1 = normalize_scanner_results('stage_analysis', stage_results["Stage 1 - Basing"]) if normalize_scanner_results else stage_results["Stage 1 - Basing"]
-                        s1 = add_tradingview_column(norm_s1)
-                        st.dataframe(pd.DataFrame(s1), 
-                                     column_config={"Stock Symbol": st.column_config.LinkColumn("Stock Symbol", display_text="NSE:(.*)")},
-                                     use_container_width=True)
-                    else: st.info("No stocks currently in the basing stage.")
-                with s_tabs[1]:
-                    if stage_results.get("Stage 2 - Advancing"):
-                        norm_s2 = normalize_scanner_results('stage_analysis', stage_results["Stage 2 - Advancing"]) if normalize_scanner_results else stage_results["Stage 2 - Advancing"]
-                        s2 = add_tradingview_column(norm_s2)
-                        st.dataframe(pd.DataFrame(s2), 
-                                     column_config={"Stock Symbol": st.column_config.LinkColumn("Stock Symbol", display_text="NSE:(.*)")},
-                                     use_container_width=True)
-                    else: st.info("No stocks currently in the advancing stage.")
-                with s_tabs[2]:
-                    if stage_results.get("Stage 3 - Top"):
-                        norm_s3 = normalize_scanner_results('stage_analysis', stage_results["Stage 3 - Top"]) if normalize_scanner_results else stage_results["Stage 3 - Top"]
-                        s3 = add_tradingview_column(norm_s3)
-                        st.dataframe(pd.DataFrame(s3), 
-                                     column_config={"Stock Symbol": st.column_config.LinkColumn("Stock Symbol", display_text="NSE:(.*)")},
-                                     use_container_width=True)
-                    else: st.info("No stocks currently in the top/distribution stage.")
-                with s_tabs[3]:
-                    if stage_results.get("Stage 4 - Declining"):
-                        norm_s4 = normalize_scanner_results('stage_analysis', stage_results["Stage 4 - Declining"]) if normalize_scanner_results else stage_results["Stage 4 - Declining"]
-                        s4 = add_tradingview_column(norm_s4)
-                        st.dataframe(pd.DataFrame(s4), 
-                                     column_config={"Stock Symbol": st.column_config.LinkColumn("Stock Symbol", display_text="NSE:(.*)")},
-                                     use_container_width=True)
-                    else: st.info("No stocks currently in the declining stage.")
-        
-        # ===== Tab 12: 15-Day History =====
-        with tab12:
-            st.subheader("📊 15-Day Scanner History & Analysis")
-            if show_all_scanners_history is not None:
-                history_view = st.radio("View Mode:", ["Individual Scanner", "Compare All"], horizontal=True)
-                if history_view == "Individual Scanner":
-                    show_all_scanners_history()
+                if compare_scanners_across_time is not None:
+                    compare_scanners_across_time()
                 else:
-                    if compare_scanners_across_time is not None:
-                        compare_scanners_across_time()
-                    else:
-                        st.warning("Compare feature unavailable.")
-            else:
-                st.warning("History UI module not loaded. Please check scanner_history_ui.py.")
+                    st.warning("Compare feature unavailable.")
+        else:
+            st.warning("History UI module not loaded. Please check scanner_history_ui.py.")
 
-    except Exception as e:
-        st.error(f"Error fetching data for {ticker}: {str(e)}")
-else:
-    st.info("Enter a Ticker Symbol in the sidebar to start analysis.")
+except Exception as e:
+    st.error(f"Error rendering dashboard: {str(e)}")
 
 # Quick-access Sidebar Button to open the 15-Day History UI (non-invasive)
 try:
@@ -0,0 +1,93 @@
+"""
+Static UI constants for the Streamlit app.
+
+app.py is re-executed on every rerun; values defined here are built once per
+process when this module is first imported.
+"""
+from types import MappingProxyType
+
+# Timeframes offered in the sidebar (default: 1d)
+TIMEFRAMES = ("1m", "5m", "15m", "1h", "4h", "1d", "1wk", "1mo")
+DEFAULT_TIMEFRAME_INDEX = 5
+
+# Periods for indicators (Capped at yfinance limits for stability)
+PERIODS = MappingProxyType({
+    "1m": "7d", "5m": "30d", "15m": "60d", "1h": "730d",
+    "4h": "730d", "1d": "max", "1wk": "max", "1mo": "max"
+})
+
+# Default AI model (hidden from UI)
+DEFAULT_MODEL = "gpt-5-nano-2025-08-07"
+
+TAB_TITLES = (
+    "📊 Agent Analysis",
+    "🤖 AI Insights",
+    "📈 Technical Charts",
+    "🏢 Financials",
+    "🔗 Related Info",
+    "🚀 Agent Recommendations",
+    "💹 Smart Money Concept",
+    "🎯 Swing Trading (15–20 Days)",
+    "⏳ Long Term Investing",
+    "🗓️ Cyclical Stocks by Quarter",
+    "📌 Stage Analysis",
+    "📊 15-Day History",
+)
+QUARTER_TAB_TITLES = ("Q1 Stocks", "Q2 Stocks", "Q3 Stocks", "Q4 Stocks")
+STAGE_TAB_TITLES = ("🏗️ Stage 1", "🚀 Stage 2", "📉 Stage 3", "💀 Stage 4")
+
+# Upper bound of the sidebar's Scan Depth (tickers per market-wide scan)
+MAX_SCAN_DEPTH = 2500
+
+# Multi-stock scanner: universe size (first N NSE symbols) and which result
+# column a high-confidence bias lands in
+MULTI_SCAN_SIZE = 50
+MULTI_SCAN_TOP_K = 20  # candidates shown per side
+SCAN_SIDE = MappingProxyType({"Bullish": "buys", "Bearish": "sells"})
+
+# Custom CSS for "Premium" look (v2.1)
+APP_CSS = """
+    <style>
+    .main {
+        background-color: #0e1117;
+    }
+    .stMetric {
+        background: rgba(255, 255, 255, 0.05);
+        padding: 15px;
+        border-radius: 10px;
+        border: 1px solid rgba(255, 255, 255, 0.1);
+    }
+    /* Wrap tab text */
+    button[data-baseweb="tab"] p {
+        white-space: normal !important;
+        text-align: center !important;
+        line-height: 1.2 !important;
+        font-size: 14px !important;
+    }
+    button[data-baseweb="tab"] {
+        height: auto !important;
+        min-height: 40px !important;
+        padding-top: 5px !important;
+        padding-bottom: 5px !important;
+    }
+    
+    /* New UI element styling */
+    .version-tag {
+        background-color: #10b981;
+        color: white;
+        padding: 4px 8px;
+        border-radius: 4px;
+        font-size: 0.8rem;
+        font-weight: bold;
+    }
+    </style>
+    """
+
+# Keep Streamlit awake by triggering events in the browser repeatedly
+KEEP_ALIVE_JS = '''
+    <script>
+    setInterval(function() {
+        window.parent.postMessage('ping', '*');
+    }, 60000);
+    </script>
+    '''
@@ -0,0 +1,123 @@
+"""
+Helpers for keeping Plotly chart payloads small.
+
+Streamlit serializes every point of every trace to the browser on each rerun,
+so long intraday histories are reduced server-side before plotting.
+"""
+import numpy as np
+
+# Serialize figures with orjson when available (plotly falls back to stdlib json
+# otherwise); set once at import, applies to every st.plotly_chart call
+try:
+    import orjson  # noqa: F401
+    import plotly.io as pio
+    pio.json.config.default_engine = "orjson"
+except (ImportError, AttributeError):
+    pass
+
+# Max bars sent to the browser per trace
+MAX_CHART_POINTS = 2000
+
+# Above this many candles, draw them as WebGL line segments instead of SVG
+CANDLE_GL_THRESHOLD = 1000
+
+_OHLCV_AGG = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+
+def downsample_ohlcv(df, max_points=MAX_CHART_POINTS):
+    """
+    Aggregate consecutive bars into at most max_points buckets.
+
+    OHLC stays faithful (first/max/min/last, volume summed); indicator columns
+    take the bucket's last value. Each bucket is stamped with its last bar's
+    timestamp. Frames already within the limit are returned unchanged.
+    """
+    n = len(df)
+    if n <= max_points:
+        return df
+
+    bucket = np.arange(n) // int(np.ceil(n / max_points))
+    agg = {col: _OHLCV_AGG.get(col, 'last') for col in df.columns}
+    out = df.groupby(bucket).agg(agg)
+    out.index = df.index[np.r_[np.flatnonzero(np.diff(bucket)), n - 1]]
+    return out
+
+
+def lttb_indices(y, max_points=MAX_CHART_POINTS):
+    """
+    Positions kept by Largest-Triangle-Three-Buckets for a line of n points.
+
+    First and last points are always kept; each bucket in between keeps the
+    point forming the largest triangle with the previously kept point and the
+    next bucket's mean, so peaks and troughs survive the reduction.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=np.float64)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    keep = np.empty(max_points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+
+    a = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[hi:nxt_hi].mean()
+        avg_y = y[hi:nxt_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def lttb_series(series, max_points=MAX_CHART_POINTS):
+    """(x, float32 y) for a line trace, LTTB-reduced to at most max_points."""
+    s = series.dropna()
+    y = s.to_numpy(dtype=np.float32)
+    if len(s) <= max_points:
+        return s.index, y
+    idx = lttb_indices(y, max_points)
+    return s.index[idx], y[idx]
+
+
+def candle_segments(x, o, h, l, c):
+    """
+    Candles as NaN-separated line segments, grouped by direction.
+
+    Returns {'up': ..., 'down': ...}, each (xs, wicks, bodies): every bar adds
+    three points (low/high or open/close, then a NaN break), so one Scattergl
+    trace draws all wicks and one draws all bodies of that colour.
+    """
+    x = np.asarray(x)
+    up = c >= o
+    out = {}
+    for side, mask in (('up', up), ('down', ~up)):
+        gap = np.full(int(mask.sum()), np.nan, dtype=np.float32)
+        xs = np.repeat(x[mask], 3)
+        wicks = np.column_stack((l[mask], h[mask], gap)).ravel()
+        bodies = np.column_stack((o[mask], c[mask], gap)).ravel()
+        out[side] = (xs, wicks, bodies)
+    return out
+
+
+def histogram_segments(x, h):
+    """
+    Histogram bars as NaN-separated vertical segments from 0, split by sign.
+
+    Returns {'up': (xs, ys), 'down': (xs, ys)} for one Scattergl trace each,
+    the bar counterpart of candle_segments().
+    """
+    x = np.asarray(x)
+    h = np.asarray(h, dtype=np.float32)
+    up = h >= 0
+    out = {}
+    for side, mask in (('up', up), ('down', ~up)):
+        n = int(mask.sum())
+        xs = np.repeat(x[mask], 3)
+        ys = np.column_stack((np.zeros(n, dtype=np.float32), h[mask],
+                              np.full(n, np.nan, dtype=np.float32))).ravel()
+        out[side] = (xs, ys)
+    return out
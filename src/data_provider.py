@@ -1,13 +1,19 @@
 """Lightweight replacement for yfinance when yfinance is unavailable or blocked.
 
 Behaviors:
-- download() first tries local CSV cache
+- download() first tries the local parquet/CSV cache
 - if missing → fallback to yfinance (added)
 - keeps same return behavior
 """
 
 import os
+import json
+import logging
+import shutil
+import threading
+import time
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from datetime import datetime
 
@@ -22,59 +28,281 @@ try:
 except Exception:
     _real_yf = None
 
+logger = logging.getLogger(__name__)
+
+# Optional binary store for the historical cache; CSV is used when missing
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+# pyarrow's multithreaded C++ CSV parser for un-migrated CSVs (pandas otherwise)
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    _CSV_READ_OPTS = pacsv.ReadOptions(use_threads=True, block_size=1 << 20)
+    _CSV_CONVERT_OPTS = pacsv.ConvertOptions(column_types={
+        col: pa.float64() for col in ('Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume')
+    })
+except ImportError:
+    pacsv = None
+
+
+# Resolved Ticker.info / fast_info dicts per bare symbol, shared by every Ticker
+# instance in the process: (symbol, kind) -> (fetched_at, value). Backed by one
+# JSON file per symbol under a per-day directory, so restarts and new sessions
+# reuse the day's lookups instead of re-fetching them.
+_INFO_CACHE = {}
+_INFO_CACHE_LOCK = threading.Lock()  # prefetch threads insert/evict concurrently
+_INFO_TTL = 3600
+_INFO_CACHE_MAX = 4096
+_INFO_DIR = Path('scanner_cache') / 'ticker_info'
+
+
+def _info_day_dir() -> Path:
+    return _INFO_DIR / datetime.now().strftime('%Y%m%d')
+
+
+def _cached_info(symbol, kind='info'):
+    entry = _INFO_CACHE.get((symbol, kind))
+    if entry is not None and time.time() - entry[0] < _INFO_TTL:
+        return entry[1]
+
+    path = _info_day_dir() / f"{symbol}.{kind}.json"
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            value = json.load(f)
+    except (OSError, ValueError):
+        return None
+    _remember_info(symbol, kind, value)
+    return value
+
+
+def _remember_info(symbol, kind, value):
+    with _INFO_CACHE_LOCK:
+        if len(_INFO_CACHE) >= _INFO_CACHE_MAX:
+            _INFO_CACHE.pop(next(iter(_INFO_CACHE)), None)
+        _INFO_CACHE[(symbol, kind)] = (time.time(), value)
+
+
+def _store_info(symbol, value, kind='info'):
+    _remember_info(symbol, kind, value)
+    day_dir = _info_day_dir()
+    try:
+        if not day_dir.exists():
+            day_dir.mkdir(parents=True, exist_ok=True)
+            # New day: earlier buckets are stale
+            for old in _INFO_DIR.iterdir():
+                if old.is_dir() and old != day_dir:
+                    shutil.rmtree(old, ignore_errors=True)
+        # Write-then-rename so concurrent readers never see a partial file
+        path = day_dir / f"{symbol}.{kind}.json"
+        tmp = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(value, f, default=str)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+# Historical OHLCV cache; created once at import rather than on every path lookup
+_HISTORICAL_DIR = Path('scanner_cache') / 'historical'
+_PARQUET_DIR = Path('scanner_cache') / 'historical_pq'
+try:
+    _HISTORICAL_DIR.mkdir(parents=True, exist_ok=True)
+except OSError:
+    pass
+
+
+def _clean(ticker: str) -> str:
+    """Bare NSE symbol ('TCS.NS' -> 'TCS')."""
+    return ticker[:-3] if ticker.endswith('.NS') else ticker
+
 
 def _local_csv_path(ticker: str) -> Path:
-    clean = ticker.replace('.NS', '')
-    base = Path('scanner_cache') / 'historical'
-    base.mkdir(parents=True, exist_ok=True)
-    return base / f"{clean}.csv"
+    return _HISTORICAL_DIR / f"{_clean(ticker)}.csv"
 
 
-def download(tickers, period=None, interval=None, auto_adjust=True,
-             group_by='ticker', progress=False, threads=False, timeout=40):
+def _parquet_path(ticker: str) -> Path:
+    return _PARQUET_DIR / f"{_clean(ticker)}.parquet"
 
-    single = False
-    if isinstance(tickers, str):
-        tickers = [tickers]
-        single = True
 
-    results = {}
+def _read_csv(path: Path):
+    """One cached CSV as a date-indexed frame."""
+    if pacsv is not None:
+        try:
+            df = pacsv.read_csv(path, read_options=_CSV_READ_OPTS,
+                                convert_options=_CSV_CONVERT_OPTS).to_pandas(self_destruct=True)
+            df = df.set_index(df.columns[0])
+            if not isinstance(df.index, pd.DatetimeIndex):
+                df.index = pd.to_datetime(df.index)
+            return df
+        except Exception:
+            pass
+    return pd.read_csv(path, parse_dates=True, index_col=0)
 
-    for t in tickers:
-        key = t.replace('.NS', '')
-        path = _local_csv_path(t)
 
-        # ✅ cache first (original behavior)
-        if path.exists():
-            try:
-                df = pd.read_csv(path, parse_dates=True, index_col=0)
-                results[key] = df
-                continue
-            except Exception:
-                pass
+def _write_parquet(df, path: Path):
+    """Atomically write df to path (no-op without pyarrow)."""
+    if pq is None or df is None or df.empty:
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        df.to_parquet(tmp, engine='pyarrow', compression='zstd')
+        os.replace(tmp, path)
+    except Exception:
+        pass
+
 
-        # ✅ added fallback only when cache missing
-        if _real_yf is not None:
+def _parquet_current(pq_path: Path, csv_path: Path) -> bool:
+    """True if the parquet copy exists and is not older than its source CSV."""
+    try:
+        pq_mtime = pq_path.stat().st_mtime
+    except OSError:
+        return False
+    try:
+        return pq_mtime >= csv_path.stat().st_mtime
+    except OSError:
+        return True  # no CSV: the parquet copy is the only one
+
+
+def _read_cached(ticker: str):
+    """
+    Cached history for ticker, or None.
+
+    Parquet is read first (typed index, no text parsing); an un-migrated CSV,
+    or one refreshed since its parquet copy was written, is read and rewritten
+    as parquet so later runs take the fast path.
+    """
+    ticker = _clean(ticker)
+    path = _local_csv_path(ticker)
+    if pq is not None:
+        pq_path = _parquet_path(ticker)
+        if _parquet_current(pq_path, path):
             try:
-                df = _real_yf.download(
-                    t,
-                    period=period,
-                    interval=interval,
-                    auto_adjust=auto_adjust,
-                    progress=False,
-                    threads=False
-                )
-                if isinstance(df, pd.DataFrame) and not df.empty:
-                    results[key] = df
-                    continue
+                return pq.read_table(pq_path).to_pandas()
             except Exception:
                 pass
 
-        # original fallback
-        results[key] = pd.DataFrame()
+    if path.exists():
+        try:
+            df = _read_csv(path)
+        except Exception:
+            return None
+        _write_parquet(df, _parquet_path(ticker))
+        return df
+    return None
+
+
+def migrate_csv_cache():
+    """One-shot rewrite of every cached CSV as parquet. Returns files migrated."""
+    if pq is None:
+        return 0
+    migrated = 0
+    for path in _HISTORICAL_DIR.glob('*.csv'):
+        target = _parquet_path(path.stem)
+        if _parquet_current(target, path):
+            continue
+        try:
+            _write_parquet(_read_csv(path), target)
+            migrated += target.exists()
+        except Exception:
+            pass
+    return migrated
+
+
+def _fetch_one(t, period=None, interval=None, auto_adjust=True):
+    """History for one ticker: local cache → yfinance → empty frame."""
+    # ✅ cache first (original behavior; parquet before CSV)
+    df = _read_cached(t)
+    if df is not None:
+        return df
+
+    # ✅ added fallback only when cache missing
+    if _real_yf is not None:
+        try:
+            df = _real_yf.download(
+                t,
+                period=period,
+                interval=interval,
+                auto_adjust=auto_adjust,
+                progress=False,
+                threads=False
+            )
+            if isinstance(df, pd.DataFrame) and not df.empty:
+                return df
+        except Exception:
+            pass
+
+    # original fallback
+    return pd.DataFrame()
+
+
+def _fetch_bulk(tickers, period=None, interval=None, auto_adjust=True):
+    """
+    Cache misses in one batched yfinance request: {ticker: DataFrame}.
+
+    Falls back to concurrent per-ticker fetches if the batched call fails.
+    """
+    if _real_yf is not None:
+        try:
+            bulk = _real_yf.download(
+                " ".join(tickers),
+                period=period,
+                interval=interval,
+                auto_adjust=auto_adjust,
+                group_by='ticker',
+                threads=True,
+                progress=False
+            )
+            if isinstance(bulk, pd.DataFrame) and not bulk.empty:
+                out = {}
+                multi = isinstance(bulk.columns, pd.MultiIndex)
+                names = set(bulk.columns.get_level_values(0)) if multi else set()
+                for t in tickers:
+                    if t in names:
+                        df = bulk[t].dropna(how='all')
+                    elif not multi and len(tickers) == 1:
+                        df = bulk
+                    else:
+                        continue
+                    if not df.empty:
+                        out[t] = df
+                return out
+        except Exception:
+            pass
+
+    # Cache misses are network-bound; fan them out (inner calls stay threads=False)
+    with ThreadPoolExecutor(max_workers=min(32, len(tickers))) as pool:
+        futures = {t: pool.submit(_fetch_one, t, period, interval, auto_adjust) for t in tickers}
+    return {t: f.result() for t, f in futures.items()}
+
+
+def download(tickers, period=None, interval=None, auto_adjust=True,
+             group_by='ticker', progress=False, threads=False, timeout=40):
+
+    # One tuple up front: the symbols are walked several times below, so a
+    # generator or other one-shot iterable must not be consumed by the first pass
+    single = isinstance(tickers, str)
+    tickers = (tickers,) if single else tuple(tickers)
+
+    clean_map = {t: _clean(t) for t in tickers}
+
+    if len(tickers) <= 1:
+        results = {clean_map[t]: _fetch_one(t, period, interval, auto_adjust) for t in tickers}
+    else:
+        with ThreadPoolExecutor(max_workers=min(32, len(tickers))) as pool:
+            cached = dict(zip(tickers, pool.map(_read_cached, tickers)))
+        missing = [t for t, df in cached.items() if df is None]
+        fetched = _fetch_bulk(missing, period, interval, auto_adjust) if missing else {}
+        results = {}
+        for t in tickers:
+            df = cached[t] if cached[t] is not None else fetched.get(t)
+            results[clean_map[t]] = df if df is not None else pd.DataFrame()
 
     if single:
-        return results.get(tickers[0].replace('.NS', ''), pd.DataFrame())
+        return results.get(clean_map[tickers[0]], pd.DataFrame())
 
     return results
 
@@ -82,16 +310,40 @@ def download(tickers, period=None, interval=None, auto_adjust=True,
 class Ticker:
 
     def __init__(self, ticker: str):
-        self.ticker = ticker.replace('.NS', '')
+        self.ticker = _clean(ticker)
+        self.ticker_ns = f"{self.ticker}.NS"
         self._info = None
         self._fast_info = None
+        self._real = None
+
+    def _real_ticker(self):
+        """Return the underlying yfinance Ticker, reusing one handed in by Tickers."""
+        if self._real is None:
+            self._real = _real_yf.Ticker(self.ticker_ns)
+        return self._real
+
+    def _fallback(self, attr):
+        """yfinance's Ticker.<attr> for this symbol; None if yfinance is missing or fails."""
+        if _real_yf is None:
+            logger.debug("yfinance unavailable; %s for %s is cache-only", attr, self.ticker)
+            return None
+        try:
+            logger.debug("Fallback to real yfinance %s for %s", attr, self.ticker)
+            return getattr(self._real_ticker(), attr, None)
+        except Exception as e:
+            logger.debug("Fallback error for %s: %s", self.ticker, e)
+            return None
 
     @property
     def info(self):
-        print(f"[DEBUG] Ticker.info called for {self.ticker}")
         if self._info is not None:
             return self._info
 
+        cached = _cached_info(self.ticker)
+        if cached is not None:
+            self._info = cached
+            return self._info
+
         info = {}
         try:
             if FundamentalCache is not None:
@@ -108,27 +360,26 @@ class Ticker:
         except Exception:
             pass
 
-        # ✅ Fallback to real yfinance if cache is empty OR missing critical data (like marketCap)
-        has_critical_data = info.get('marketCap') and info.get('marketCap') > 0
-        
-        if (not info or not has_critical_data) and _real_yf is not None:
-            try:
-                print(f"[DEBUG] Fallback to real yfinance for {self.ticker}")
-                t = _real_yf.Ticker(f"{self.ticker}.NS")
-                real_info = t.info
-                print(f"[DEBUG] Got info for {self.ticker}: {list(real_info.keys())[:5] if real_info else 'EMPTY'}")
-                
-                # Merge real info into cached info (real info takes precedence)
-                if real_info:
-                    info.update(real_info)
-            except Exception as e:
-                print(f"[DEBUG] Fallback error for {self.ticker}: {e}")
-                pass
-        else:
-             if _real_yf is None:
-                 print(f"[DEBUG] _real_yf is None! Import failed?")
+        # A fundamentals record missing only marketCap gets it from the light
+        # fast_info lookup instead of the full .info payload
+        has_fundamentals = any(v for k, v in info.items() if k != 'shortName')
+        if has_fundamentals and not info.get('marketCap'):
+            info['marketCap'] = self.market_cap
+
+        # ✅ Fallback to real yfinance only if the fundamentals cache had nothing
+        if not has_fundamentals:
+            real_info = self._fallback('info')
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Got info for %s: %s", self.ticker,
+                             list(real_info.keys())[:5] if real_info else 'EMPTY')
+
+            # Merge real info into cached info (real info takes precedence)
+            if real_info:
+                info.update(real_info)
 
         self._info = info
+        if info:
+            _store_info(self.ticker, info)
         return self._info
 
     @property
@@ -136,6 +387,11 @@ class Ticker:
         if self._fast_info is not None:
             return self._fast_info
 
+        cached = _cached_info(self.ticker, 'fast_info')
+        if cached is not None:
+            self._fast_info = cached
+            return self._fast_info
+
         fi = {}
         try:
             if FundamentalCache is not None:
@@ -145,23 +401,110 @@ class Ticker:
         except Exception:
             pass
 
-        # ✅ Fallback to real yfinance
-        if not fi and _real_yf is not None:
+        # ✅ Fallback to real yfinance (also when the cached record lacks market cap)
+        if not fi.get('market_cap'):
+            real_fi = self._fallback('fast_info')
             try:
-                t = _real_yf.Ticker(f"{self.ticker}.NS")
-                if hasattr(t, 'fast_info'):
-                    real_fi = t.fast_info
-                    if real_fi:
-                        # Convert fast_info object to dict-like if needed or just return it
-                        # But analysis_engine expects dict or object access. 
-                        # fast_info in yfinance is an object.
-                        # Here we return a dict for compatibility with our cache wrapper
-                        fi['market_cap'] = real_fi.market_cap
+                # yfinance's fast_info is an object; keep a plain dict for the cache
+                if real_fi:
+                    fi['market_cap'] = real_fi.market_cap
             except Exception:
                 pass
 
         self._fast_info = fi
+        if fi.get('market_cap'):
+            _store_info(self.ticker, fi, 'fast_info')
         return self._fast_info
 
+    @property
+    def market_cap(self):
+        """Market cap alone, via fast_info (no full .info fetch)."""
+        return self.fast_info.get('market_cap')
+
+
+# Shared Ticker per bare symbol: symbol -> (created_at, Ticker). Reused for
+# _INFO_TTL so repeat lookups across scanners and tabs keep the resolved info
+# and the yfinance handle instead of rebuilding them.
+_TICKERS = {}
+_TICKERS_LOCK = threading.Lock()
+
+
+def ticker(symbol: str) -> Ticker:
+    """Shared Ticker for symbol (with or without .NS)."""
+    clean = _clean(symbol)
+    now = time.time()
+    hit = _TICKERS.get(clean)
+    if hit is not None and now - hit[0] < _INFO_TTL:
+        return hit[1]
+    with _TICKERS_LOCK:
+        # Re-check: another thread may have built this symbol meanwhile
+        hit = _TICKERS.get(clean)
+        if hit is not None and now - hit[0] < _INFO_TTL:
+            return hit[1]
+        t = Ticker(clean)
+        if len(_TICKERS) >= _INFO_CACHE_MAX:
+            _TICKERS.pop(next(iter(_TICKERS)), None)
+        _TICKERS[clean] = (now, t)
+    return t
+
+
+class Tickers:
+    """Multi-symbol counterpart of Ticker, mirroring yfinance.Tickers.
+
+    One yfinance.Tickers object is built for the whole batch so fallback
+    lookups share its session instead of each symbol opening its own.
+    """
+
+    def __init__(self, tickers):
+        if isinstance(tickers, str):
+            tickers = tickers.replace(',', ' ').split()
+        symbols = [t if t.endswith('.NS') else f"{t}.NS" for t in tickers]
+
+        real = None
+        if _real_yf is not None and symbols:
+            try:
+                real = _real_yf.Tickers(" ".join(symbols))
+            except Exception:
+                real = None
+
+        self.tickers = {}
+        for sym in symbols:
+            t = Ticker(sym)
+            if real is not None:
+                t._real = real.tickers.get(sym.upper())
+            self.tickers[sym] = t
+
+    def prefetch_info(self, max_workers=16, min_market_cap=None):
+        """
+        Resolve .info for every symbol concurrently (cache, then yfinance).
+
+        With min_market_cap, symbols whose fast_info market cap is already known
+        to be below it are skipped, matching the scanners' cheap gate. Returns
+        {symbol: market cap} for the caps looked up, so callers can reuse them.
+        """
+        def load(item):
+            sym, t = item
+            cap = None
+            try:
+                if min_market_cap:
+                    cap = t.market_cap
+                    if cap and cap < min_market_cap:
+                        return sym, cap
+                t.info
+            except Exception:
+                pass
+            return sym, cap
+
+        pending = [(sym, t) for sym, t in self.tickers.items() if t._info is None]
+        if not pending:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+            return {sym: cap for sym, cap in executor.map(load, pending) if cap}
+
+
+def prefetch_infos(symbols, max_workers=32, min_market_cap=None):
+    """Warm _INFO_CACHE for many symbols at once; later Ticker(...).info calls are dict lookups."""
+    return Tickers(list(symbols)).prefetch_info(max_workers=max_workers, min_market_cap=min_market_cap)
+
 
-__all__ = ['download', 'Ticker']
+__all__ = ['download', 'Ticker', 'ticker', 'Tickers', 'prefetch_infos', 'migrate_csv_cache']
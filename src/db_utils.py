@@ -1,13 +1,43 @@
 import os
 import json
+import atexit
 from datetime import datetime
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, Column, String, DateTime, Text, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+
+# Faster JSON for stored scanner payloads; stdlib json otherwise
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 load_dotenv()
 
+
+def _dump_json(data):
+    """Serialize to UTF-8 JSON bytes; non-JSON values fall back to str()."""
+    if orjson is not None:
+        return orjson.dumps(data, default=str,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=str).encode('utf-8')
+
+
+def _load_json(raw):
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def executemany_options(db_url):
+    """psycopg2 fast-execution helpers for multi-row writes (other drivers reject these)."""
+    try:
+        if make_url(db_url).get_driver_name() == 'psycopg2':
+            return {'executemany_mode': 'values_plus_batch', 'executemany_batch_page_size': 500}
+    except Exception:
+        pass
+    return {}
+
 Base = declarative_base()
 
 class ScannerResult(Base):
@@ -23,13 +53,20 @@ class PostgresDBManager:
         if not self.db_url:
             raise ValueError("DATABASE_URL not found in environment variables")
         
-        # Create engine with connection pooling recycling to prevent SSL drop
-        self.engine = create_engine(self.db_url, pool_pre_ping=True, pool_recycle=300)
+        # Create engine with connection pooling recycling to prevent SSL drop;
+        # sized for the scanner's concurrent workers, LIFO so idle extras age out;
+        # JSONB values are encoded with orjson when installed
+        self.engine = create_engine(self.db_url, pool_pre_ping=True, pool_recycle=300,
+                                    pool_size=10, max_overflow=20, pool_use_lifo=True,
+                                    json_serializer=lambda data: _dump_json(data).decode('utf-8'),
+                                    json_deserializer=_load_json,
+                                    **executemany_options(self.db_url))
         
         # Create tables if they don't exist
         Base.metadata.create_all(self.engine)
         
         self.Session = sessionmaker(bind=self.engine)
+        atexit.register(self.engine.dispose)
 
     def save_results(self, scanner_type, results):
         """Save scanner results to PostgreSQL and history."""
@@ -42,25 +79,22 @@ class PostgresDBManager:
         
         session = self.Session()
         try:
-            # Check if exists
-            existing = session.query(ScannerResult).filter_by(scanner_type=scanner_type).first()
-            
             now = datetime.now()
             
             # Sanitize results to avoid NaN/Inf and non-serializable types
             safe_results = sanitize_for_json(results) if sanitize_for_json else results
 
-            if existing:
-                existing.data = safe_results
-                existing.last_updated = now
-            else:
-                new_entry = ScannerResult(
-                    scanner_type=scanner_type, 
-                    data=safe_results, 
-                    last_updated=now
-                )
-                session.add(new_entry)
-            
+            # Single upsert round-trip instead of SELECT then INSERT/UPDATE
+            stmt = pg_insert(ScannerResult).values(
+                scanner_type=scanner_type,
+                data=safe_results,
+                last_updated=now
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['scanner_type'],
+                set_={'data': stmt.excluded.data, 'last_updated': stmt.excluded.last_updated}
+            )
+            session.execute(stmt)
             session.commit()
             print(f"[OK] Saved {len(results)} items to DB for {scanner_type}")
             
@@ -111,8 +145,10 @@ class LocalDBManager:
             "last_updated": datetime.now().isoformat(),
             "results": results
         }
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=2, default=str)
+        # One serialize + one write, swapped in atomically so readers never see a partial file
+        tmp_path = file_path.with_suffix('.json.tmp')
+        tmp_path.write_bytes(_dump_json(data))
+        os.replace(tmp_path, file_path)
     
     def get_results(self, scanner_type):
         """Retrieve scanner results from local JSON file."""
@@ -121,8 +157,7 @@ class LocalDBManager:
             return None, None
         
         try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
+            data = _load_json(file_path.read_bytes())
             last_updated = datetime.fromisoformat(data["last_updated"])
             return data["results"], last_updated
         except Exception as e:
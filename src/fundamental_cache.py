@@ -8,14 +8,17 @@ Solves the issue of yFinance returning incomplete data for Indian stocks.
 import json
 import csv
 import os
+import threading
 from pathlib import Path
 from datetime import datetime, timedelta
 import pandas as pd
-import requests
 
 class FundamentalCache:
     """Caches fundamental data and provides fallback mechanisms."""
     
+    _shared = None
+    _shared_lock = threading.Lock()
+    
     def __init__(self, cache_dir="scanner_cache"):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
@@ -33,11 +36,23 @@ class FundamentalCache:
         else:
             self.cache = {}
     
+    @classmethod
+    def shared(cls):
+        """Process-wide instance, so lookups don't re-read the JSON file each time."""
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+    
     def save_cache(self):
         """Save cache to disk."""
         try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f, indent=2, default=str)
+            # Snapshot: other threads may add entries while this one writes
+            snapshot = dict(self.cache)
+            with self._shared_lock:
+                with open(self.cache_file, 'w') as f:
+                    json.dump(snapshot, f, indent=2, default=str)
         except Exception as e:
             print(f"⚠️ Could not save cache: {e}")
     
@@ -79,7 +94,8 @@ class FundamentalCache:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
             }
             
-            response = requests.get(url, headers=headers, timeout=5)
+            from performance_utils import get_http_session
+            response = get_http_session().get(url, headers=headers, timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 
@@ -195,7 +211,7 @@ class FundamentalCache:
         Get complete fundamental data for a ticker.
         Uses cache first, then tries multiple sources.
         """
-        cache = FundamentalCache()
+        cache = FundamentalCache.shared()
         
         # Check cache first
         cached = cache.get_cached(ticker)
@@ -1,19 +1,51 @@
 """
 Performance utilities for parallel stock scanning and caching.
 """
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
 from functools import lru_cache, wraps
 import time
 from typing import List, Callable, Any, Dict
 import threading
+import queue
+import asyncio
+import json
+import os
+from pathlib import Path
+from app_config import MAX_SCAN_DEPTH
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# Parquet engine for the async chart cache; the cache is skipped without it
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
 
 # Thread-safe cache for stock data with TTL
 _cache_lock = threading.Lock()
 _stock_data_cache = {}
 _cache_ttl = 300  # 5 minutes
 
-def timed_cache(seconds: int = 300):
-    """Decorator that caches function results with a time-to-live."""
+def timed_cache(seconds: int = 300, ignore: tuple = (), max_entries: int = 32, should_cache: Callable = None):
+    """
+    Decorator that caches function results with a time-to-live.
+    
+    Keyword arguments named in `ignore` (e.g. progress callbacks) are left out
+    of the cache key. At most `max_entries` results are kept: expired ones are
+    dropped on every store, then the oldest. `should_cache(result, *args,
+    **kwargs)` can veto storing a result (it is still returned). On a cache hit
+    a `progress_callback` keyword argument is called once at 100% so progress
+    bars still complete.
+    """
     def decorator(func):
         cache = {}
         cache_times = {}
@@ -22,24 +54,42 @@ def timed_cache(seconds: int = 300):
         @wraps(func)
         def wrapper(*args, **kwargs):
             # Create cache key from args
-            key = str(args) + str(sorted(kwargs.items()))
+            key = str(args) + str(sorted((k, v) for k, v in kwargs.items() if k not in ignore))
             
+            hit = False
             with lock:
                 # Check if cached and not expired
                 if key in cache:
                     if time.time() - cache_times[key] < seconds:
-                        return cache[key]
+                        hit, result = True, cache[key]
                     else:
                         # Expired, remove from cache
                         del cache[key]
                         del cache_times[key]
             
+            if hit:
+                callback = kwargs.get('progress_callback')
+                if callable(callback):
+                    total = len(args[0]) if args and hasattr(args[0], '__len__') else 1
+                    callback(total, total, '(cached)')
+                return result
+            
             # Call function and cache result
             result = func(*args, **kwargs)
+            if should_cache is not None and not should_cache(result, *args, **kwargs):
+                return result
             
             with lock:
+                now = time.time()
+                for stale in [k for k, t in cache_times.items() if now - t >= seconds]:
+                    del cache[stale]
+                    del cache_times[stale]
+                while cache and len(cache) >= max_entries:
+                    oldest = min(cache_times, key=cache_times.get)
+                    del cache[oldest]
+                    del cache_times[oldest]
                 cache[key] = result
-                cache_times[key] = time.time()
+                cache_times[key] = now
             
             return result
         
@@ -81,33 +131,39 @@ def parallel_process_stocks(
     pool = list(ticker_pool)[:max_stocks] if max_stocks else list(ticker_pool)
     total = len(pool)
     
+    # ✅ Bounded fan-out: at most 2x workers futures in flight, so a stalled
+    # ticker can't leave hundreds of queued tasks (and their frames) pinned
+    max_in_flight = max_workers * 2
+    pending_tickers = iter(pool)
+    
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tasks
         future_to_ticker = {
-            executor.submit(process_func, ticker): ticker 
-            for ticker in pool
+            executor.submit(process_func, ticker): ticker
+            for ticker in islice(pending_tickers, max_in_flight)
         }
         
-        # Process completed tasks
+        # Process completed tasks, topping the window back up as each finishes
         completed = 0
-        for future in as_completed(future_to_ticker):
-            ticker = future_to_ticker[future]
-            completed += 1
-            
-            try:
-                result = future.result(timeout=timeout_per_stock)
-                if result is not None:
-                    results.append(result)
+        while future_to_ticker:
+            done, _ = wait(future_to_ticker, return_when=FIRST_COMPLETED)
+            for future in done:
+                ticker = future_to_ticker.pop(future)
+                completed += 1
+                
+                try:
+                    result = future.result(timeout=timeout_per_stock)
+                    if result is not None:
+                        results.append(result)
+                except Exception:
+                    # Skip failed stocks silently
+                    pass
                 
                 # Progress callback
                 if progress_callback:
                     progress_callback(completed, total, ticker)
-                    
-            except Exception as e:
-                # Skip failed stocks silently
-                if progress_callback:
-                    progress_callback(completed, total, ticker)
-                continue
+            
+            for ticker in islice(pending_tickers, len(done)):
+                future_to_ticker[executor.submit(process_func, ticker)] = ticker
     
     return results
 
@@ -193,6 +249,20 @@ def create_stock_processor(analysis_func: Callable, result_limit: int = 20):
     return processor
 
 
+def get_market_cap(t) -> float:
+    """
+    Read market cap from fast_info, touching the heavier .info only if missing.
+    
+    (Passing t.info.get(...) as the .get() default evaluated it eagerly, so
+    every lookup paid for the full .info payload even when fast_info had it.)
+    """
+    fast_info = getattr(t, 'fast_info', None) or {}
+    mcap = fast_info.get('market_cap')
+    if not mcap:
+        mcap = t.info.get('marketCap', 0)
+    return mcap or 0
+
+
 def filter_by_market_cap(ticker_pool: List[str], min_market_cap: float = 10000000000) -> List[str]:
     """
     Pre-filter tickers by market cap to reduce processing time.
@@ -210,9 +280,7 @@ def filter_by_market_cap(ticker_pool: List[str], min_market_cap: float = 1000000
     def check_mcap(ticker):
         try:
             full_ticker = f"{ticker}.NS" if not ticker.endswith(".NS") else ticker
-            # Use fast_info if available in newer yfinance, else info
-            t = yf.Ticker(full_ticker)
-            mcap = getattr(t, 'fast_info', {}).get('market_cap', t.info.get('marketCap', 0))
+            mcap = get_market_cap(yf.ticker(full_ticker))
             if mcap >= min_market_cap:
                 return ticker
         except:
@@ -231,11 +299,261 @@ def is_market_cap_ok(ticker: str, min_market_cap: float = 10000000000) -> bool:
     import data_provider as yf
     try:
         full_ticker = f"{ticker}.NS" if not ticker.endswith(".NS") else ticker
-        t = yf.Ticker(full_ticker)
-        mcap = getattr(t, 'fast_info', {}).get('market_cap', t.info.get('marketCap', 0))
-        return mcap >= min_market_cap
+        return get_market_cap(yf.ticker(full_ticker)) >= min_market_cap
     except:
         return False
+# Shared keep-alive session for plain HTTP calls (AI endpoint, screener.in).
+# yfinance keeps its own shared (curl_cffi) session and is not routed through this.
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """Process-wide requests.Session with a pooled, retrying HTTPS adapter."""
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+                session = requests.Session()
+                # Idempotent requests retry with backoff on connection errors and 429/5xx
+                retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504))
+                adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20, max_retries=retry)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _http_session = session
+    return _http_session
+
+
+_ai_client = None
+
+
+def get_ai_client():
+    """
+    Keep-alive client for the AI chat endpoint.
+    
+    httpx.Client (HTTP/2 when the h2 extra is installed) if httpx is available,
+    otherwise the shared requests session. Both accept post(url, headers=, json=, timeout=).
+    """
+    global _ai_client
+    if _ai_client is None:
+        with _http_session_lock:
+            if _ai_client is None:
+                client = None
+                if httpx is not None:
+                    limits = httpx.Limits(max_connections=10, max_keepalive_connections=4)
+                    try:
+                        client = httpx.Client(http2=True, limits=limits, timeout=60.0)
+                    except ImportError:  # http2 needs the h2 package
+                        client = httpx.Client(limits=limits, timeout=60.0)
+                _ai_client = client
+    return _ai_client or get_http_session()
+
+
+# Yahoo chart API used by the async download path
+_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+_CHART_HEADERS = {"User-Agent": "Mozilla/5.0"}
+_CHART_MAX_CONNECTIONS = 100
+
+# Last chart frame per (symbol, period, interval) as compact parquet, with its
+# ETag/Last-Modified validators in a small JSON sidecar, so repeat fetches can
+# be answered with a bodyless 304. Needs pyarrow; without it nothing is cached.
+_CHART_CACHE_DIR = Path('scanner_cache') / 'chart'
+_CHART_CACHE_MAX_AGE = 7 * 86400
+_chart_cache_pruned = 0.0
+
+
+def _chart_cache_paths(sym: str, period: str, interval: str):
+    stem = _CHART_CACHE_DIR / f"{sym}_{period}_{interval}"
+    return stem.with_suffix('.parquet'), stem.with_suffix('.json')
+
+
+def _prune_chart_cache():
+    """Drop cached charts not refreshed in _CHART_CACHE_MAX_AGE (at most hourly)."""
+    global _chart_cache_pruned
+    now = time.time()
+    if now - _chart_cache_pruned < 3600:
+        return
+    _chart_cache_pruned = now
+    try:
+        for path in _CHART_CACHE_DIR.iterdir():
+            try:
+                if now - path.stat().st_mtime > _CHART_CACHE_MAX_AGE:
+                    path.unlink()
+            except OSError:
+                pass
+    except OSError:
+        pass
+
+
+def _load_chart_cache(sym: str, period: str, interval: str):
+    """(validators, frame) from the last stored response, or None."""
+    import pandas as pd
+
+    frame_path, meta_path = _chart_cache_paths(sym, period, interval)
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        return meta, pd.read_parquet(frame_path)
+    except Exception:
+        return None
+
+
+def _atomic_write(path: Path, write):
+    # Write-then-rename under a per-process/thread temp name, so concurrent
+    # writers (other sessions' scans) never share a temp file and readers never
+    # see a partial one
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+def _save_chart_cache(sym: str, period: str, interval: str, meta: Dict[str, Any], df):
+    frame_path, meta_path = _chart_cache_paths(sym, period, interval)
+
+    def write_meta(tmp):
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    # Frame first: validators must never point at a frame that isn't there
+    _atomic_write(frame_path, lambda tmp: df.to_parquet(tmp, engine='pyarrow', compression='zstd'))
+    if frame_path.exists():
+        _atomic_write(meta_path, write_meta)
+
+
+def _chart_to_frame(payload: Dict[str, Any], interval: str):
+    """Convert a v8 chart payload to an auto-adjusted OHLCV DataFrame (or None)."""
+    import pandas as pd
+    import numpy as np
+
+    try:
+        result = payload['chart']['result'][0]
+        quote = result['indicators']['quote'][0]
+        index = pd.to_datetime(result['timestamp'], unit='s', utc=True)
+    except (KeyError, IndexError, TypeError):
+        return None
+
+    tz = (result.get('meta') or {}).get('exchangeTimezoneName')
+    if tz:
+        index = index.tz_convert(tz)
+    if interval.endswith(('d', 'wk', 'mo')):
+        # Daily and longer bars: tz-naive dates, as yf.download returns them
+        index = index.normalize().tz_localize(None)
+
+    df = pd.DataFrame({
+        'Open': quote.get('open'),
+        'High': quote.get('high'),
+        'Low': quote.get('low'),
+        'Close': quote.get('close'),
+        'Volume': quote.get('volume'),
+    }, index=index, dtype=float)
+
+    # Match yfinance auto_adjust=True: scale OHLC by adjclose / close
+    adj = result['indicators'].get('adjclose')
+    if adj and adj[0].get('adjclose'):
+        adj_close = np.asarray(adj[0]['adjclose'], dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = adj_close / df['Close'].to_numpy()
+        df[['Open', 'High', 'Low']] = df[['Open', 'High', 'Low']].mul(ratio, axis=0)
+        df['Close'] = adj_close
+
+    df = df.dropna(subset=['Close'])
+    return df if not df.empty else None
+
+
+async def _fetch_chart(sym: str, session, period: str, interval: str):
+    """
+    Fetch one symbol from the chart API; returns (sym, df or None).
+    
+    Sends If-None-Match / If-Modified-Since from the last cached response, so
+    an unchanged series costs one round-trip with no body (304).
+    """
+    params = {'range': period, 'interval': interval, 'includeAdjustedClose': 'true'}
+    # File I/O and parquet decode run off the event loop
+    cached = await asyncio.to_thread(_load_chart_cache, sym, period, interval) if pq is not None else None
+
+    headers = {}
+    if cached:
+        meta = cached[0]
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+    try:
+        async with session.get(_CHART_URL.format(symbol=sym), params=params, headers=headers) as resp:
+            if resp.status == 304 and cached:
+                return sym, cached[1]
+            if resp.status != 200:
+                return sym, None
+            payload = await resp.json(content_type=None)
+            etag = resp.headers.get('ETag')
+            last_modified = resp.headers.get('Last-Modified')
+    except Exception:
+        return sym, None
+
+    df = _chart_to_frame(payload, interval)
+    # Only worth storing when the server gave us something to revalidate with
+    if df is not None and pq is not None and (etag or last_modified):
+        await asyncio.to_thread(_save_chart_cache, sym, period, interval,
+                                {'etag': etag, 'last_modified': last_modified}, df)
+    return sym, df
+
+
+async def _gather_charts(batch: List[str], period: str, interval: str):
+    _CHART_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    _prune_chart_cache()
+    connector = aiohttp.TCPConnector(limit=_CHART_MAX_CONNECTIONS)
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=_CHART_HEADERS) as session:
+        return await asyncio.gather(*[_fetch_chart(s, session, period, interval) for s in batch])
+
+
+def batch_download_data_async(batch: List[str], period: str = '60d', interval: str = '1d') -> Dict[str, Any]:
+    """
+    Download many symbols concurrently on one event loop via aiohttp.
+    
+    Returns {clean_symbol: df} for the symbols that came back with enough
+    rows; anything missing is left for the caller's yfinance fallback.
+    Returns {} when aiohttp is not installed or an event loop is already
+    running in this thread.
+    """
+    if aiohttp is None or not batch:
+        return {}
+    try:
+        pairs = asyncio.run(_gather_charts(batch, period, interval))
+    except RuntimeError:
+        return {}
+
+    results = {}
+    for sym, df in pairs:
+        if df is not None and len(df) >= 20:
+            results[sym.replace(".NS", "")] = df
+    return results
+
+
+# Compact dtypes for scanner frames: float32 prices, int64 volume
+_OHLCV_DTYPES = {'Open': 'float32', 'High': 'float32', 'Low': 'float32', 'Close': 'float32'}
+
+
+def _compact_ohlcv(df):
+    """Downcast OHLC to float32 and Volume to int64; drop unused Adj Close."""
+    if 'Adj Close' in df.columns:
+        df = df.drop(columns=['Adj Close'])
+    df = df.astype({c: t for c, t in _OHLCV_DTYPES.items() if c in df.columns})
+    if 'Volume' in df.columns:
+        df['Volume'] = df['Volume'].fillna(0).astype('int64')
+    return df
+
+
 def batch_download_data(tickers: List[str], period: str = '60d', interval: str = '1d') -> Dict[str, Any]:
     """
     Download data for multiple tickers in batches to improve performance.
@@ -255,6 +573,14 @@ def batch_download_data(tickers: List[str], period: str = '60d', interval: str =
         
     results = {}
     
+    # ✅ Async fast path: all symbols in flight on one event loop; whatever
+    # it misses goes through the chunked yfinance download below
+    if aiohttp is not None:
+        results.update(batch_download_data_async(formatted_tickers, period, interval))
+        formatted_tickers = [t for t in formatted_tickers if t.replace(".NS", "") not in results]
+        if not formatted_tickers:
+            return {k: _compact_ohlcv(v) for k, v in results.items()}
+    
     # Chunk tickers into batches
     # Use smaller batches for long periods to avoid timeouts/errors
     if 'y' in period or 'max' in period:
@@ -335,5 +661,144 @@ def batch_download_data(tickers: List[str], period: str = '60d', interval: str =
         # Small sleep
         if len(chunks) > 1:
             time.sleep(1.0)
-            
+    
+    # ✅ Downcast at ingest: half the bytes through every rolling/agg op
+    return {k: _compact_ohlcv(v) for k, v in results.items()}
+
+
+def _batch_size(period: str) -> int:
+    """Tickers per download batch: smaller for multi-year history."""
+    return 50 if ('y' in period or 'max' in period) else 150
+
+
+# Room for every batch of a max-depth scan in each period the scanners share
+# (multi-year for cyclical / Weinstein, 60d for SMC / swing), plus slack for
+# the multi-stock scanner, so one scan never evicts another's, or its own, batches
+_BATCH_CACHE_ENTRIES = (
+    2 * -(-MAX_SCAN_DEPTH // _batch_size('10y'))
+    + 2 * -(-MAX_SCAN_DEPTH // _batch_size('60d'))
+    + 16
+)
+
+# A batch that came back this thin (e.g. rate-limited) is returned but not cached
+_MIN_BATCH_COVERAGE = 0.5
+
+
+def _batch_complete(result, tickers_key, period, interval) -> bool:
+    return len(result) >= len(tickers_key) * _MIN_BATCH_COVERAGE
+
+
+@timed_cache(600, max_entries=_BATCH_CACHE_ENTRIES, should_cache=_batch_complete)
+def _cached_batch(tickers_key: tuple, period: str, interval: str) -> Dict[str, Any]:
+    return batch_download_data(list(tickers_key), period=period, interval=interval)
+
+
+def cached_batch_download(tickers: List[str], period: str = '60d', interval: str = '1d') -> Dict[str, Any]:
+    """
+    batch_download_data shared across scanners and reruns for 10 minutes.
+    
+    Returns a fresh dict of frame copies: scanners pop entries and append
+    indicator columns, which must not leak into the cached batch.
+    """
+    data = _cached_batch(tuple(sorted(set(tickers))), period, interval)
+    return {k: v.copy() for k, v in data.items()}
+
+
+cached_batch_download.clear_cache = _cached_batch.clear_cache
+
+
+def iter_batch_downloads(tickers: List[str], period: str = '60d', interval: str = '1d', batch_size: int = None):
+    """
+    Yield (batch, batch_data) per batch, double-buffered.
+    
+    A background thread downloads batch N+1 while the caller processes batch N
+    (queue depth 1, so at most one batch is waiting). The inter-batch
+    rate-limit sleep happens on the producer, off the caller's critical path.
+    """
+    pool = list(dict.fromkeys(tickers))
+    if batch_size is None:
+        batch_size = _batch_size(period)
+    batches = [pool[i:i + batch_size] for i in range(0, len(pool), batch_size)]
+    
+    q = queue.Queue(maxsize=1)
+    done = object()
+    stop = threading.Event()
+    
+    def put(item):
+        """Hand item to the consumer; give up once the consumer has stopped."""
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def producer():
+        try:
+            for i, batch in enumerate(batches):
+                if stop.is_set():
+                    return
+                try:
+                    data = cached_batch_download(batch, period=period, interval=interval)
+                except Exception as e:
+                    print(f"Batch download error: {e}")
+                    data = {}
+                if not put((batch, data)):
+                    return
+                if i < len(batches) - 1 and stop.wait(1.0):
+                    return
+        finally:
+            put(done)
+    
+    worker = threading.Thread(target=producer, daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = q.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        # Caller bailed early: tell the producer to stop and drop any batch it
+        # already queued, so neither the thread nor the data outlives the loop
+        stop.set()
+        try:
+            q.get_nowait()
+        except queue.Empty:
+            pass
+
+
+def pipelined_scan(
+    tickers: List[str],
+    process_func: Callable,
+    period: str = '60d',
+    interval: str = '1d',
+    max_workers: int = 20,
+    timeout_per_stock: float = 1.0,
+    progress_callback: Callable = None
+) -> List[Any]:
+    """
+    Run process_func(ticker, batch_data) over tickers, overlapping the download
+    of the next batch with processing of the current one.
+    
+    Progress is reported against the whole pool, like parallel_process_stocks.
+    """
+    results = []
+    total = len(tickers)
+    offset = 0
+    
+    for batch, batch_data in iter_batch_downloads(tickers, period=period, interval=interval):
+        results.extend(parallel_process_stocks(
+            batch,
+            lambda ticker, data=batch_data: process_func(ticker, data),
+            max_workers=max_workers,
+            max_stocks=None,
+            timeout_per_stock=timeout_per_stock,
+            progress_callback=(
+                lambda curr, tot, ticker, start=offset: progress_callback(start + curr, total, ticker)
+            ) if progress_callback else None
+        ))
+        offset += len(batch)
+    
     return results
@@ -17,6 +17,7 @@ from sqlalchemy import create_engine, Column, String, DateTime, Text, Integer, I
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.dialects.postgresql import JSONB
 from dotenv import load_dotenv
+from db_utils import executemany_options
 
 load_dotenv()
 
@@ -47,7 +48,8 @@ class ScannerHistoryManager:
         self.use_db = bool(self.db_url)
         
         if self.use_db:
-            self.engine = create_engine(self.db_url, pool_pre_ping=True, pool_recycle=300)
+            self.engine = create_engine(self.db_url, pool_pre_ping=True, pool_recycle=300,
+                                        **executemany_options(self.db_url))
             Base.metadata.create_all(self.engine)
             self.Session = sessionmaker(bind=self.engine)
         else: